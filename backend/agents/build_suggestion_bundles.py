@@ -0,0 +1,21 @@
+import asyncio
+
+from backend.core.ai_service import build_suggestion_bundle
+from backend.core.http_clients import http_client_pools
+from backend.core.logging_config import setup_logging
+from backend.core.suggestion_bundles import suggestion_bundles
+
+
+async def build_suggestion_bundles():
+    """
+    Dokuz duygu etiketinin her biri için öneri paketlerini çevrimdışı üretir ve
+    SUGGESTION_BUNDLES_PATH dosyasına yazar. Uygulama açılışta bu dosyayı yükler.
+    """
+    suggestion_bundles.load()
+    async with http_client_pools():
+        await suggestion_bundles.rebuild(build_suggestion_bundle)
+
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(build_suggestion_bundles())
@@ -1,12 +1,16 @@
 import os
 import asyncio
+import logging
 import re
 from typing import Dict, Any
 
 from backend.core.config import settings
-from backend.core.ai_service import generate_palette_from_colormind
+from backend.core.ai_service import generate_palette
 from backend.core.spotify_service import get_spotify_access_token, search_spotify_playlist
-from backend.core.gemini_service import generate_inspiration_with_gemini
+from backend.core.gemini_service import generate_inspiration_with_gemini_async
+from backend.core.logging_config import setup_logging
+
+logger = logging.getLogger(__name__)
 
 
 async def generate_content_for_mood(mood: str, user_text: str) -> Dict[str, Any]:
@@ -25,38 +29,31 @@ async def generate_content_for_mood(mood: str, user_text: str) -> Dict[str, Any]
         #     model_name="local-model"
         # )
         
-        print(f"'{mood}' için e-posta içeriği üretiliyor...")
+        logger.info("'%s' için e-posta içeriği üretiliyor...", mood)
 
-        # 1. Profesyonel Renk Paleti (Colormind API)
-        color_palette_list = await generate_palette_from_colormind(mood)
+        # 1. Profesyonel Renk Paleti (Colormind API veya yerel palet motoru)
+        color_palette_list = await generate_palette(mood)
         color_palette_str = ", ".join(color_palette_list)
-        print(f"Renk paleti üretildi: {color_palette_str}")
+        logger.debug("Renk paleti üretildi: %s", color_palette_str)
 
         # 2. Kaliteli Alıntı (Yönlendirilmiş Prompt)
-        print(f"Gemini için user_text: '{user_text}'")
-        quote = generate_inspiration_with_gemini(user_text)
-        print(f"Gemini'den gelen ilham sözü (raw): '{quote}'")
+        quote = await generate_inspiration_with_gemini_async(user_text)
+        logger.debug("Gemini'den gelen ilham sözü (raw): '%s'", quote)
         if not quote:
             quote = "Bu hafta sana özel bir söz bulamadık ama gelecek hafta daha iyi olacak!"
-
-        print(f"Son ilham sözü: '{quote}'")
         
         # 3. Akıllı Spotify Listesi
-        print("Spotify erişim tokenı alınıyor...")
         spotify_token = await get_spotify_access_token()
         if spotify_token:
-            print("Spotify erişim tokenı başarıyla alındı.")
             search_term = f"{mood} ruh hali müzik"
-            print(f"Spotify için arama terimi: '{search_term}'")
             playlist_url = await search_spotify_playlist(search_term, spotify_token)
-            print(f"Spotify'dan gelen playlist URL'si: '{playlist_url}'")
             if playlist_url:
                 spotify_url = playlist_url
             else:
-                print("Spotify playlist bulunamadı, varsayılan URL kullanılıyor.")
+                logger.info("Spotify playlist bulunamadı, varsayılan URL kullanılıyor.")
         else:
-            print("Spotify erişim tokenı alınamadı, varsayılan URL kullanılıyor.")
-        print(f"Son Spotify URL'si: {spotify_url}")
+            logger.warning("Spotify erişim tokenı alınamadı, varsayılan URL kullanılıyor.")
+        logger.debug("Son Spotify URL'si: %s", spotify_url)
 
         return {
             "quote": quote,
@@ -65,7 +62,7 @@ async def generate_content_for_mood(mood: str, user_text: str) -> Dict[str, Any]
         }
 
     except Exception as e:
-        print(f"İçerik üretilirken bir hata oluştu: {e}")
+        logger.error("İçerik üretilirken bir hata oluştu: %s", e, exc_info=True)
         return {
             "quote": "Bu hafta sana özel bir söz bulamadık ama gelecek hafta daha iyi olacak!",
             "spotify_url": "https://open.spotify.com/",
@@ -73,6 +70,7 @@ async def generate_content_for_mood(mood: str, user_text: str) -> Dict[str, Any]
         }
 
 if __name__ == '__main__':
+    setup_logging()
     mood = "hüzünlü"
     # Asenkron fonksiyonu çalıştırmak için asyncio.run kullanılır
     content = asyncio.run(generate_content_for_mood(mood))
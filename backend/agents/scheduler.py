@@ -1,14 +1,18 @@
 import time
 import asyncio
+import logging
 from apscheduler.schedulers.background import BackgroundScheduler
+from backend.core.logging_config import setup_logging
 from .weekly_mood_report import send_weekly_mood_reports
 
+logger = logging.getLogger(__name__)
+
 def run_async_job():
     """
     Asenkron `send_weekly_mood_reports` fonksiyonunu çalıştırmak için bir sarmalayıcı.
     APScheduler senkron bir ortamda çalıştığı için bu gereklidir.
     """
-    print("Zamanlanmış görev tetiklendi, asenkron raporlama başlatılıyor...")
+    logger.info("Zamanlanmış görev tetiklendi, asenkron raporlama başlatılıyor...")
     asyncio.run(send_weekly_mood_reports())
 
 def start_scheduler():
@@ -16,6 +20,7 @@ def start_scheduler():
     Haftalık rapor gönderimini zamanlamak için bir zamanlayıcı başlatır.
     Görev, her Pazar saat 21:00'de çalışacak şekilde ayarlanmıştır.
     """
+    setup_logging()
     scheduler = BackgroundScheduler(timezone="Europe/Istanbul")
     
     # Görevi her Pazar saat 21:00'de çalışacak şekilde ayarla
@@ -30,7 +35,7 @@ def start_scheduler():
     )
     """
     scheduler.start()
-    print("Zamanlayıcı başlatıldı. Haftalık raporlar her Pazar 21:00'de gönderilecek.")
+    logger.info("Zamanlayıcı başlatıldı. Haftalık raporlar her Pazar 21:00'de gönderilecek.")
 
     try:
         # Ana thread'in sonlanmasını engellemek için sonsuz döngü
@@ -38,7 +43,7 @@ def start_scheduler():
             time.sleep(2)
     except (KeyboardInterrupt, SystemExit):
         scheduler.shutdown()
-        print("Zamanlayıcı durduruldu.")
+        logger.info("Zamanlayıcı durduruldu.")
 
 if __name__ == "__main__":
     start_scheduler()
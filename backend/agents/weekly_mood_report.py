@@ -1,6 +1,7 @@
 import smtplib
 import ssl
 import asyncio
+import logging
 import pynliner
 import os
 from jinja2 import Environment, FileSystemLoader
@@ -18,8 +19,12 @@ from backend.db.models import User, MoodEntry
 
 from sqlalchemy.orm import selectinload
 from backend.core.config import settings
+from backend.core.http_clients import http_client_pools
+from backend.core.logging_config import setup_logging
 from .content_agent import generate_content_for_mood # content_agent'tan import
 
+logger = logging.getLogger(__name__)
+
 # E-posta gönderimi için SMTP ayarları config'den okunur
 SMTP_SERVER = "smtp.gmail.com"  # Genellikle sabit kalır
 SMTP_PORT = 587  # Genellikle sabit kalır
@@ -97,9 +102,9 @@ def send_email(receiver_email: str, subject: str, html_content: str):
             server.starttls(context=context)
             server.login(SENDER_EMAIL, SENDER_PASSWORD)
             server.sendmail(SENDER_EMAIL, receiver_email, message.as_string())
-        print(f"E-posta başarıyla gönderildi: {receiver_email}")
+        logger.info("E-posta başarıyla gönderildi: %s", receiver_email)
     except Exception as e:
-        print(f"E-posta gönderilirken hata oluştu: {e}")
+        logger.error("E-posta gönderilirken hata oluştu: %s", e, exc_info=True)
 
 def render_email_template(username: str, dominant_mood: str, content: dict) -> str:
     """
@@ -123,17 +128,18 @@ async def send_weekly_mood_reports():
     """
     Ana asenkron fonksiyon: Aktif kullanıcıları bulur, içerik üretir ve e-posta gönderir.
     """
-    print("Haftalık rapor gönderim süreci başlatıldı...")
-    async with AsyncSessionFactory() as session:
+    logger.info("Haftalık rapor gönderim süreci başlatıldı...")
+    # Tüm kullanıcılar için aynı Colormind/Spotify bağlantı havuzları kullanılır.
+    async with http_client_pools(), AsyncSessionFactory() as session:
         try:
             active_users = await get_active_users_last_week(session)
-            print(f"Bu hafta {len(active_users)} aktif kullanıcı bulundu.")
+            logger.info("Bu hafta %d aktif kullanıcı bulundu.", len(active_users))
             
             for user in active_users:
                 dominant_mood_label, user_text = await get_dominant_mood_for_user(session, user.id)
                 
                 if dominant_mood_label:
-                    print(f"Kullanıcı: {user.username}, Baskın Duygu: {dominant_mood_label}")
+                    logger.info("Kullanıcı: %s, Baskın Duygu: %s", user.username, dominant_mood_label)
                     
                     generated_content = await generate_content_for_mood(dominant_mood_label, user_text)
                     
@@ -141,12 +147,13 @@ async def send_weekly_mood_reports():
                     
                     send_email(user.email, "Bu Haftaki Duygu Raporun Hazır!", email_html)
                 else:
-                    print(f"Kullanıcı {user.username} için baskın duygu bulunamadı.")
+                    logger.info("Kullanıcı %s için baskın duygu bulunamadı.", user.username)
                     
         except Exception as e:
-            print(f"Raporlama sürecinde bir hata oluştu: {e}")
+            logger.error("Raporlama sürecinde bir hata oluştu: %s", e, exc_info=True)
         finally:
-            print("Haftalık rapor gönderim süreci tamamlandı.")
+            logger.info("Haftalık rapor gönderim süreci tamamlandı.")
 
 if __name__ == "__main__":
+    setup_logging()
     asyncio.run(send_weekly_mood_reports())
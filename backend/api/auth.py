@@ -1,8 +1,10 @@
+import asyncio
 import logging
 import json
 import os
 import shutil
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, File, UploadFile, Header
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -11,23 +13,29 @@ from typing import List
 from backend.db import crud
 from backend.core.config import settings
 from backend.core.security import create_access_token, verify_password
-from backend.core.ai_service import get_ai_suggestions
-from backend.db.database import get_db
-from backend.db.models import MoodEntry, Suggestion
+from backend.core.ai_service import get_ai_suggestions, stream_ai_suggestions
+from backend.core.analysis_jobs import AnalysisJob, analysis_job_queue
+from backend.core.metrics import timed, track_stage
+from backend.db.database import get_db, AsyncSessionFactory
 from backend.schemas import (
     Token, TokenData, User, UserCreate, UserResponse, 
     HistoryResponse, AnalysisRequest, AnalysisResponse,
-    MoodEntryResponse, UserUpdate, ReasoningCreate, MoodEntryCreate # MoodEntryCreate'i import et
+    MoodEntryResponse, UserUpdate, ReasoningCreate,
+    AnalysisJobCreated, AnalysisJobStatus,
 )
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 router = APIRouter()
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bu başlık "true"/"1" ise öneriler dış servisler beklenmeden önceden
+# üretilmiş duygu paketlerinden verilir.
+FAST_MODE_HEADER = "X-MoodMuse-Fast"
 
+
+@timed("auth.get_current_user")
 async def get_current_user(
     token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
 ) -> User:
@@ -130,41 +138,22 @@ async def analyze_text_and_get_suggestions(
     request: AnalysisRequest,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    fast_mode: bool = Header(False, alias=FAST_MODE_HEADER),
 ):
-    ai_results = await get_ai_suggestions(request.text_input)
+    ai_results = await get_ai_suggestions(request.text_input, request.emoji, fast=fast_mode)
 
     if "error" in ai_results:
         raise HTTPException(status_code=500, detail=ai_results["error"])
 
-    # CRUD fonksiyonunu yeni emoji parametresiyle çağır
-    db_mood_entry = await crud.create_mood_entry(
+    db_mood_entry = await crud.create_mood_entry_with_suggestions(
         db=db,
-        mood_entry=MoodEntryCreate(
-            text_input=request.text_input,
-            mood_label=ai_results.get("mood_label", "bilinmiyor"),
-        ),
         user_id=current_user.id,
-        emoji=request.emoji # Emoji'yi buradan geçir
+        text_input=request.text_input,
+        ai_results=ai_results,
+        emoji=request.emoji,
     )
-    
-    suggestions = [
-        Suggestion(
-            suggestion_type="color",
-            content=",".join(ai_results.get("color_palette", [])),
-        ),
-        Suggestion(
-            suggestion_type="music", 
-            content=ai_results.get("spotify_playlist"),
-        ),
-        Suggestion(
-            suggestion_type="quote", 
-            content=ai_results.get("inspirational_quote"),
-        ),
-    ]
-    db_mood_entry.suggestions.extend(suggestions)
-
-    db.add(db_mood_entry)
-    await db.commit()
+    with track_stage("db_commit"):
+        await db.commit()
     await db.refresh(db_mood_entry) # ID'yi almak için bu satır gerekli
 
     return AnalysisResponse(
@@ -172,6 +161,148 @@ async def analyze_text_and_get_suggestions(
         color_palette=ai_results.get("color_palette"),
         spotify_playlist=ai_results.get("spotify_playlist"),
         inspirational_quote=ai_results.get("inspirational_quote"),
+        degraded_stages=ai_results.get("degraded_stages", []),
+    )
+
+
+def _sse_event(event: str, data) -> str:
+    """Server-Sent Events biçiminde tek bir olay satırı oluşturur."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/analyze/stream")
+async def analyze_text_and_stream_suggestions(
+    request: AnalysisRequest,
+    current_user: User = Depends(get_current_user),
+    fast_mode: bool = Header(False, alias=FAST_MODE_HEADER),
+):
+    """
+    `/analyze` ile aynı işi yapar, ancak sonuçları Server-Sent Events olarak
+    hazır oldukça gönderir: önce `mood_label`, ardından tamamlanma sırasına göre
+    `color_palette`, `inspirational_quote`, `spotify_playlist` ve
+    `degraded_stages`, en son kaydedilen girdinin kimliğiyle `done` olayı.
+    """
+    user_id = current_user.id
+
+    async def event_stream():
+        ai_results = {}
+        try:
+            async for event, value in stream_ai_suggestions(request.text_input, request.emoji, fast=fast_mode):
+                ai_results[event] = value
+                yield _sse_event(event, value)
+        except Exception as e:
+            logger.error(f"Streaming analysis failed for user ID {user_id}: {e}", exc_info=True)
+            yield _sse_event("error", {"detail": "AI servisinden yanıt alınamadı."})
+            return
+
+        # Bağımlılıkla gelen oturum yanıt akışı başlamadan kapandığı için
+        # kayıt işlemi akışa ait ayrı bir oturumla yapılır.
+        try:
+            async with AsyncSessionFactory() as db:
+                try:
+                    db_mood_entry = await crud.create_mood_entry_with_suggestions(
+                        db=db,
+                        user_id=user_id,
+                        text_input=request.text_input,
+                        ai_results=ai_results,
+                        emoji=request.emoji,
+                    )
+                    with track_stage("db_commit"):
+                        await db.commit()
+                    await db.refresh(db_mood_entry)
+                except Exception:
+                    await db.rollback()
+                    raise
+        except Exception as e:
+            # Öneriler zaten gönderildi; istemci akışın yarıda kesildiğini değil,
+            # kaydın başarısız olduğunu görsün.
+            logger.error(f"Saving streamed analysis failed for user ID {user_id}: {e}", exc_info=True)
+            yield _sse_event("error", {"detail": "Analiz sonucu kaydedilemedi."})
+            return
+        yield _sse_event("done", {"mood_entry_id": db_mood_entry.id})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def run_analysis_job(job: AnalysisJob) -> dict:
+    """
+    Kuyruktaki bir analiz işini çalıştırır: önerileri üretir, `/analyze` ile
+    aynı yoldan kaydeder ve `AnalysisResponse` içeriğini döndürür.
+    """
+    ai_results = await get_ai_suggestions(job.text_input, job.emoji)
+    if "error" in ai_results:
+        raise RuntimeError(ai_results["error"])
+
+    async with AsyncSessionFactory() as db:
+        db_mood_entry = await crud.create_mood_entry_with_suggestions(
+            db=db,
+            user_id=job.user_id,
+            text_input=job.text_input,
+            ai_results=ai_results,
+            emoji=job.emoji,
+        )
+        with track_stage("db_commit"):
+            await db.commit()
+        await db.refresh(db_mood_entry)
+
+    return AnalysisResponse(
+        mood_entry_id=db_mood_entry.id,
+        color_palette=ai_results.get("color_palette"),
+        spotify_playlist=ai_results.get("spotify_playlist"),
+        inspirational_quote=ai_results.get("inspirational_quote"),
+        degraded_stages=ai_results.get("degraded_stages", []),
+    ).model_dump()
+
+
+@router.post(
+    "/analyze/jobs",
+    response_model=AnalysisJobCreated,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def submit_analysis_job(
+    request: AnalysisRequest,
+    current_user: User = Depends(get_current_user),
+):
+    """Analizi arka plandaki işçi havuzuna bırakır ve hemen bir iş kimliği döndürür."""
+    try:
+        job = analysis_job_queue.submit(
+            user_id=current_user.id, text_input=request.text_input, emoji=request.emoji
+        )
+    except asyncio.QueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Analiz kuyruğu dolu, lütfen biraz sonra tekrar deneyin.",
+            headers={"Retry-After": "5"},
+        )
+    return AnalysisJobCreated(job_id=job.id, status=job.status)
+
+
+@router.get("/analyze/jobs/{job_id}", response_model=AnalysisJobStatus)
+async def get_analysis_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Bir analiz işinin durumunu, tamamlandıysa sonucuyla birlikte döndürür.
+
+    İşler yalnızca onları kabul eden sürecin belleğinde tutulur; bu uç nokta
+    tek worker (`uvicorn --workers 1`) ile çalışıldığını varsayar. Birden çok
+    worker'da istek başka bir sürece düşerse iş bulunamaz (404).
+    """
+    job = analysis_job_queue.get(job_id)
+    if job is None or job.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="İş bulunamadı."
+        )
+    return AnalysisJobStatus(
+        job_id=job.id,
+        status=job.status,
+        result=job.result,
+        detail=job.error,
     )
 
 
@@ -1,102 +1,223 @@
 from .config import settings
-import httpx
-from langchain_openai import ChatOpenAI
 import re
 import json
 import random
+import asyncio
+import logging
 from .spotify_service import get_spotify_access_token, search_spotify_playlist
-from .gemini_service import generate_inspiration_with_gemini # Gemini servisimizi import ediyoruz
+from .gemini_service import GEMINI_FALLBACK_MESSAGE, generate_inspiration_with_gemini_async # Gemini servisimizi import ediyoruz
+from .colormind_service import (
+    MOOD_TO_COLORMIND_MODEL,
+    DEFAULT_COLOR_PALETTE,
+    generate_palette_from_colormind,
+)
+from .palette_engine import generate_local_palette
+from .mood_classifier import classify_mood
+from .metrics import track_stage
+from .suggestion_bundles import suggestion_bundles
 import sys
 import os
 # Projenin kök dizinini Python yoluna ekle
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 from rag import retrieve, prompt_builder # RAG modüllerini import et
 
-llm = ChatOpenAI(
-    temperature=0.7,
-    openai_api_base=f"{settings.AI_SERVICE_URL}/v1",
-    openai_api_key="sk-111111111111111111111111111111111111111111111111",
-    model_name="local-model"
-)
+logger = logging.getLogger(__name__)
+
+# Aşamalar zaman aşımına uğradığında veya hata verdiğinde kullanılan varsayılanlar.
+DEFAULT_SPOTIFY_PLAYLIST = "https://open.spotify.com/search/error"
+DEFAULT_INSPIRATIONAL_QUOTE = "Bir an dur ve sadece nefes al; her şey yoluna girecek."
+
+# Öneri paketleri üretilirken kullanıcı metni yerine kullanılan metin.
+BUNDLE_SEED_TEXT = "Bugün kendimi {mood} hissediyorum."
+
+
+class StageFallbackError(Exception):
+    """
+    Bir aşama dış servise ulaşamayıp yalnızca genel yedek değerini (gri palet,
+    sabit motto, arama sayfası) üretebildiğinde fırlatılır; böylece aşama
+    bozulmuş sayılır ve varsa önceden üretilmiş paketteki değer kullanılır.
+    """
+
+async def _generate_rag_motto(text: str, mood_label: str) -> str:
+    """RAG bağlamını toplar ve Gemini ile motto üretir."""
+    # Sonuç önbellekteyse doğrudan kullanılır; değilse Chroma sorguları senkron
+    # çalıştığı için olay döngüsünü bloklamamak adına ayrı bir thread'de yürütülür.
+    with track_stage("rag_retrieval"):
+        picked = retrieve.cached_pick_for(mood_label)
+        if picked is None:
+            picked = await asyncio.to_thread(retrieve.pick_for, mood_label)
+        _, _, evidence = picked
+    rag_prompt = prompt_builder.build_prompt(
+        user_text=text,
+        emotion=mood_label,
+        evidence=evidence
+    )
+    # get_motto_from_gemini hataları ve zaman aşımlarını yedek mottoya çevirir;
+    # aşamanın hata sayacına yansısın diye yedek değer blok içinde hata sayılır.
+    with track_stage("gemini"):
+        motto = await get_motto_from_gemini(rag_prompt)
+        if motto in (GEMINI_FALLBACK_MESSAGE, DEFAULT_INSPIRATIONAL_QUOTE):
+            raise StageFallbackError("Gemini motto üretemedi.")
+    return motto
+
 
-# Duyguları, Colormind API'sinin modelleriyle eşleştiriyoruz.
-MOOD_TO_COLORMIND_MODEL = {
-    "mutlu": "default",
-    "üzgün": "ui",
-    "kızgın": "default",
-    "şaşkın": "default",
-    "sakin": "ui",
-    "enerjik": "default",
-    "düşünceli": "ui",
-    "kararsız": "default",
-    "karmaşık": "default"
-}
-
-async def generate_palette_from_colormind(mood_label: str) -> list[str]:
-    """Colormind API'sini kullanarak duyguya uygun, AI tabanlı bir renk paleti oluşturur."""
-    model = MOOD_TO_COLORMIND_MODEL.get(mood_label, "default")
-    payload = {"model": model}
+async def generate_palette(mood_label: str) -> list[str]:
+    """Duyguya uygun paleti PALETTE_SOURCE ayarına göre Colormind'dan veya yerel motordan üretir."""
+    if settings.PALETTE_SOURCE == "local":
+        return generate_local_palette(mood_label)
+    return await generate_palette_from_colormind(mood_label)
 
+
+async def _generate_palette(mood_label: str) -> list[str]:
+    with track_stage("local_palette" if settings.PALETTE_SOURCE == "local" else "colormind"):
+        palette = await generate_palette(mood_label)
+        if palette == DEFAULT_COLOR_PALETTE:
+            raise StageFallbackError("Colormind paleti alınamadı.")
+    return palette
+
+
+async def _find_spotify_playlist(mood_label: str) -> str:
+    """Duyguya uygun bir Spotify çalma listesi URL'si bulur."""
+    with track_stage("spotify_token"):
+        spotify_token = await get_spotify_access_token()
+        if not spotify_token:
+            raise StageFallbackError("Spotify token'ı alınamadı.")
+    search_term = f"{mood_label} ruh hali müzik"
+    with track_stage("spotify_search"):
+        playlist_url = await search_spotify_playlist(search_term, spotify_token)
+        if playlist_url in (None, DEFAULT_SPOTIFY_PLAYLIST, "https://open.spotify.com/"):
+            raise StageFallbackError("Spotify çalma listesi bulunamadı.")
+    return playlist_url
+
+
+async def build_suggestion_bundle(mood_label: str) -> dict | None:
+    """
+    Öneri paketi havuzu için bir duyguya ait eksiksiz bir paket üretir.
+    Aşamalardan biri yedek değere düşerse paket üretilmez (None).
+    """
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.post("http://colormind.io/api/", json=payload)
-            response.raise_for_status()
-            rgb_palette = response.json().get("result", [])
-            hex_palette = [f"#{r:02x}{g:02x}{b:02x}" for r, g, b in rgb_palette]
-            return hex_palette[:4]
-    except Exception as e:
-        print(f"Colormind API hatası: {e}")
-        return ["#D3D3D3", "#A9A9A9", "#808080", "#696969"]
+        color_palette, inspirational_quote, spotify_playlist = await asyncio.gather(
+            _generate_palette(mood_label),
+            _generate_rag_motto(BUNDLE_SEED_TEXT.format(mood=mood_label), mood_label),
+            _find_spotify_playlist(mood_label),
+        )
+    except StageFallbackError:
+        return None
+    return {
+        "color_palette": color_palette,
+        "inspirational_quote": inspirational_quote,
+        "spotify_playlist": spotify_playlist,
+    }
 
-async def get_ai_suggestions(text: str) -> dict:
+
+async def _iter_stages_with_deadline(stages: dict, defaults: dict, deadline: float):
+    """
+    Verilen aşamaları eşzamanlı çalıştırır ve her biri tamamlandıkça
+    `(aşama, değer, bozuldu_mu)` üçlüsünü üretir. `deadline` (olay döngüsü
+    saatine göre) içinde tamamlanmayan veya hata veren aşamalar varsayılan
+    değerlerine düşer.
+    """
+    loop = asyncio.get_running_loop()
+    tasks = {asyncio.create_task(coro): name for name, coro in stages.items()}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=max(deadline - loop.time(), 0),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                break
+            for task in done:
+                name = tasks[task]
+                if task.exception() is None:
+                    yield name, task.result(), False
+                else:
+                    logger.warning("'%s' aşaması hata verdi: %s", name, task.exception())
+                    yield name, defaults[name], True
+        for task in pending:
+            name = tasks[task]
+            logger.warning("'%s' aşaması süre bütçesini aştı, varsayılan değer kullanılıyor.", name)
+            yield name, defaults[name], True
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def stream_ai_suggestions(text: str, emoji: str | None = None, fast: bool = False):
+    """
+    Önerileri hazır oldukça `(olay, değer)` çiftleri olarak üretir: önce
+    `mood_label`, ardından tamamlanma sırasına göre `color_palette`,
+    `inspirational_quote` ve `spotify_playlist`, en son `degraded_stages`.
+
+    Duygu etiketi belirlendikten sonra palet, motto ve playlist aşamaları
+    birbirinden bağımsız olduğu için eşzamanlı çalıştırılır. İstek başına
+    `ANALYZE_DEADLINE_SECONDS` süre bütçesini aşan veya yedek değere düşen
+    aşamalar, varsa duygunun önceden üretilmiş öneri paketindeki değeri,
+    yoksa genel varsayılanı kullanır ve `degraded_stages` listesinde raporlanır.
+
+    `fast` True ise ve duygu için bir paket varsa dış servisler hiç
+    çağrılmadan öneriler doğrudan paketten verilir.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.ANALYZE_DEADLINE_SECONDS
+
+    # Adım 1: Duygu Analizi (emoji → anahtar kelime → embedding → yerel model)
+    with track_stage("classification"):
+        mood_label = await classify_mood(text, emoji)
+    if mood_label not in MOOD_TO_COLORMIND_MODEL:
+        mood_label = "karmaşık"
+    yield "mood_label", mood_label
+
+    bundle = suggestion_bundles.pick(mood_label)
+    if fast and bundle is not None:
+        for name, value in bundle.items():
+            yield name, value
+        yield "degraded_stages", []
+        return
+
+    # Adım 2-4: Renk paleti (Colormind), ilham sözü (RAG + Gemini) ve
+    # Spotify playlist'i yalnızca duygu etiketine bağlıdır; paralel çalıştır.
+    degraded_stages = []
+    stages = _iter_stages_with_deadline(
+        stages={
+            "color_palette": _generate_palette(mood_label),
+            "inspirational_quote": _generate_rag_motto(text, mood_label),
+            "spotify_playlist": _find_spotify_playlist(mood_label),
+        },
+        defaults=bundle or {
+            "color_palette": list(DEFAULT_COLOR_PALETTE),
+            "inspirational_quote": DEFAULT_INSPIRATIONAL_QUOTE,
+            "spotify_playlist": DEFAULT_SPOTIFY_PLAYLIST,
+        },
+        deadline=deadline,
+    )
+    try:
+        async for name, value, degraded in stages:
+            if degraded:
+                degraded_stages.append(name)
+            yield name, value
+    finally:
+        await stages.aclose()
+    yield "degraded_stages", degraded_stages
+
+
+async def get_ai_suggestions(text: str, emoji: str | None = None, fast: bool = False) -> dict:
     """
     Kullanıcı metninden duygu tahmini yapar, Colormind ile renk paleti üretir,
     ve RAG destekli motto dahil diğer önerileri dinamik olarak oluşturur.
+    Kullanıcının seçtiği emoji, duygu sınıflandırmasında ön bilgi olarak kullanılır.
+    Aşamaların nasıl çalıştırıldığı için `stream_ai_suggestions`'a bakınız.
     """
     try:
-        # Adım 1: Duygu Analizi (Yerel model ile)
-        mood_prompt = (
-            f"Verilen metnin ana duygusunu şu listeden birini seçerek belirle: "
-            f"mutlu, üzgün, kızgın, şaşkın, sakin, enerjik, düşünceli, kararsız. "
-            f"Cevabı SADECE tek kelime olarak, örneğin 'mutlu' şeklinde ver.\n\n"
-            f"Metin: \"{text}\""
-        )
-        mood_response = await llm.ainvoke(mood_prompt)
-        full_response = mood_response.content.strip()
-        mood_label = full_response.split()[0].lower().strip('(),."')
-
-        if mood_label not in MOOD_TO_COLORMIND_MODEL:
-            mood_label = "karmaşık"
-
-        # Adım 2: Colormind API'sinden Renk Paleti Alımı
-        color_list = await generate_palette_from_colormind(mood_label)
-
-        # Adım 3: İlham Sözü Üretimi (RAG + Google Gemini ile)
-        # RAG sistemini kullanarak Gemini için zenginleştirilmiş bir prompt oluşturuyoruz.
-        _, _, evidence = retrieve.pick_for(mood_label)
-        rag_prompt = prompt_builder.build_prompt(
-            user_text=text,
-            emotion=mood_label,
-            evidence=evidence
-        )
-        inspirational_quote = await get_motto_from_gemini(rag_prompt)
-
-        # Adım 4: Spotify Playlist Bulma
-        spotify_token = await get_spotify_access_token()
-        playlist_url = "https://open.spotify.com/search/error"
-        if spotify_token:
-            search_term = f"{mood_label} ruh hali müzik"
-            playlist_url = await search_spotify_playlist(search_term, spotify_token)
-
-        return {
-            "mood_label": mood_label,
-            "color_palette": color_list,
-            "spotify_playlist": playlist_url,
-            "inspirational_quote": inspirational_quote,
-        }
+        results = {}
+        async for event, value in stream_ai_suggestions(text, emoji, fast=fast):
+            results[event] = value
+        return results
 
     except Exception as e:
-        print(f"Öneri üretimi sırasında hata oluştu: {e}")
+        logger.error("Öneri üretimi sırasında hata oluştu: %s", e, exc_info=True)
         return {"error": "AI servisinden yanıt alınamadı."}
 
 
@@ -109,10 +230,11 @@ async def get_motto_from_gemini(prompt: str) -> str:
         # Gemini servisini doğrudan çağırıyoruz.
         # generate_inspiration_with_gemini fonksiyonu zaten bu işi yapıyor,
         # sadece isim farklılığı ve potansiyel olarak farklı bir ön-işleme mantığı olabilir.
-        # Şimdilik mevcut fonksiyonu yeniden kullanalım.
-        motto = generate_inspiration_with_gemini(prompt)
+        # Şimdilik mevcut fonksiyonu yeniden kullanalım; async sürümü olay
+        # döngüsünü bloklamaz.
+        motto = await generate_inspiration_with_gemini_async(prompt)
         return motto
     except Exception as e:
-        print(f"Gemini'den motto alınırken hata oluştu: {e}")
+        logger.error("Gemini'den motto alınırken hata oluştu: %s", e)
         # Hata durumunda genel bir, sakinleştirici motto döndürelim.
-        return "Bir an dur ve sadece nefes al; her şey yoluna girecek."
\ No newline at end of file
+        return DEFAULT_INSPIRATIONAL_QUOTE
\ No newline at end of file
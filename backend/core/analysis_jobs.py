@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisJob:
+    """Kuyruğa alınmış tek bir analiz işinin durumu ve sonucu."""
+
+    def __init__(self, user_id: int, text_input: str, emoji: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.text_input = text_input
+        self.emoji = emoji
+        self.status = "queued"  # queued -> running -> completed | failed
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+
+class AnalysisJobQueue:
+    """
+    Analiz işlerini sınırlı bir kuyrukta tutar ve sabit sayıda işçi (worker)
+    görevle süreç içinde çalıştırır. Tamamlanan işler `result_ttl` saniye
+    boyunca sorgulanabilir kalır. İşler süreç belleğinde tutulduğundan iş
+    modu tek worker'lı bir sunucu gerektirir.
+    """
+
+    def __init__(self, max_queue_size: int, worker_count: int, result_ttl: float):
+        self.max_queue_size = max_queue_size
+        self.worker_count = worker_count
+        self.result_ttl = result_ttl
+        self._queue: asyncio.Queue | None = None
+        self._workers: list[asyncio.Task] = []
+        self._jobs: dict[str, AnalysisJob] = {}
+        self._handler: Callable[[AnalysisJob], Awaitable[dict]] | None = None
+
+    async def start(self, handler: Callable[[AnalysisJob], Awaitable[dict]]) -> None:
+        """İşçi görevlerini başlatır. `handler` bir işi çalıştırıp sonucunu döndürür."""
+        self._handler = handler
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker(index)) for index in range(self.worker_count)
+        ]
+        logger.info("Analiz iş kuyruğu %d işçi ile başlatıldı.", self.worker_count)
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, user_id: int, text_input: str, emoji: Optional[str] = None) -> AnalysisJob:
+        """
+        Yeni bir işi kuyruğa ekler. Kuyruk başlatılmamışsa RuntimeError,
+        doluysa asyncio.QueueFull fırlatır.
+        """
+        if self._queue is None:
+            raise RuntimeError("Analiz iş kuyruğu başlatılmadı.")
+        self._prune()
+        job = AnalysisJob(user_id=user_id, text_input=text_input, emoji=emoji)
+        self._queue.put_nowait(job)
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> AnalysisJob | None:
+        return self._jobs.get(job_id)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _prune(self) -> None:
+        # Süresi dolmuş tamamlanmış işleri bellekten temizle.
+        cutoff = time.time() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            try:
+                job.result = await self._handler(job)
+                job.status = "completed"
+            except Exception as e:
+                logger.error("Analiz işi %s başarısız oldu: %s", job.id, e, exc_info=True)
+                job.error = "AI servisinden yanıt alınamadı."
+                job.status = "failed"
+            finally:
+                job.finished_at = time.time()
+                self._queue.task_done()
+
+
+analysis_job_queue = AnalysisJobQueue(
+    max_queue_size=settings.ANALYSIS_JOB_QUEUE_SIZE,
+    worker_count=settings.ANALYSIS_JOB_WORKERS,
+    result_ttl=settings.ANALYSIS_JOB_RESULT_TTL,
+)
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, TypeVar
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Devre açıkken yapılan çağrılar bu hatayla hemen reddedilir."""
+
+
+class CircuitBreaker:
+    """
+    Bir dış servis için devre kesici.
+
+    Art arda `failure_threshold` çağrı hata verirse veya `slow_call_seconds`
+    süresini aşarsa devre açılır ve çağrılar `open_seconds` boyunca beklemeden
+    `CircuitOpenError` ile reddedilir. Bu sürenin sonunda tek bir deneme
+    (half-open) çağrısına izin verilir; başarılı olursa devre kapanır, olmazsa
+    yeniden açılır.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, slow_call_seconds: float, open_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.rejected_calls = 0
+        self._probe_in_flight = False
+        # Devre her açıldığında artar; açılmadan önce kabul edilmiş çağrıların
+        # sonuçları yeni duruma uygulanmaz.
+        self._epoch = 0
+
+    def _allow(self) -> tuple[bool, bool]:
+        """(çağrı kabul edildi mi, kabul edilen çağrı half-open denemesi mi)"""
+        if self.state == "closed":
+            return True, False
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.open_seconds:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True, True
+        return False, False
+
+    def _open(self) -> None:
+        if self.state != "open":
+            logger.warning("'%s' devresi açıldı; çağrılar %.0f sn boyunca reddedilecek.", self.name, self.open_seconds)
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self._epoch += 1
+
+    def _record_success(self) -> None:
+        if self.state != "closed":
+            logger.info("'%s' devresi yeniden kapandı.", self.name)
+        self.state = "closed"
+        self.consecutive_failures = 0
+
+    def _record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    async def call(self, func: Callable[[], Awaitable[T]]) -> T:
+        """`func()` çağrısını devre kesici üzerinden çalıştırır."""
+        allowed, is_probe = self._allow()
+        if not allowed:
+            self.rejected_calls += 1
+            raise CircuitOpenError(f"'{self.name}' devresi açık.")
+        epoch = self._epoch
+        started_at = time.monotonic()
+        try:
+            result = await func()
+        except Exception:
+            self._finish(is_probe, epoch, failed=True)
+            raise
+        except BaseException:
+            # İptal edilen çağrı başarı/hata sayılmaz; yalnızca deneme hakkı geri verilir.
+            if is_probe:
+                self._probe_in_flight = False
+            raise
+        self._finish(is_probe, epoch, failed=time.monotonic() - started_at > self.slow_call_seconds)
+        return result
+
+    def _finish(self, is_probe: bool, epoch: int, failed: bool) -> None:
+        if is_probe:
+            # half-open -> closed/open geçişini yalnızca deneme çağrısı belirler.
+            self._probe_in_flight = False
+        elif epoch != self._epoch:
+            # Devre bu çağrı başladıktan sonra açıldı; sonucu yeni durumu etkilemez.
+            return
+        if failed:
+            self._record_failure()
+        else:
+            self._record_success()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "rejected_calls": self.rejected_calls,
+        }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Verilen servis ("colormind", "spotify", "gemini", "llm") için paylaşılan devre kesiciyi döndürür."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            name=name,
+            failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+            slow_call_seconds=settings.CIRCUIT_SLOW_CALL_SECONDS.get(name, float("inf")),
+            open_seconds=settings.CIRCUIT_OPEN_SECONDS,
+        )
+        _breakers[name] = breaker
+    return breaker
+
+
+def breaker_stats() -> dict:
+    return {name: breaker.stats() for name, breaker in _breakers.items()}
+
+
+async def hedged(func: Callable[[], Awaitable[T]], delay: float) -> T:
+    """
+    Yalnızca idempotent okumalar için: ilk deneme `delay` saniye içinde
+    bitmezse ikinci bir deneme başlatır ve önce başarıyla biten sonucu döndürür.
+    `delay` 0 veya negatifse tek deneme yapılır.
+    """
+    if delay <= 0:
+        return await func()
+    first = asyncio.create_task(func())
+    tasks = {first}
+    try:
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+
+        tasks.add(asyncio.create_task(func()))
+        pending = set(tasks)
+        error: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        # Çağıran iptal edilse de oluşturulan denemelerin hiçbiri askıda kalmaz.
+        for task in tasks:
+            task.cancel()
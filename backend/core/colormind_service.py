@@ -0,0 +1,115 @@
+import asyncio
+import logging
+from collections import deque
+
+from .circuit_breaker import get_breaker
+from .config import settings
+from .http_clients import get_http_client
+
+logger = logging.getLogger(__name__)
+
+# Duyguları, Colormind API'sinin modelleriyle eşleştiriyoruz.
+MOOD_TO_COLORMIND_MODEL = {
+    "mutlu": "default",
+    "üzgün": "ui",
+    "kızgın": "default",
+    "şaşkın": "default",
+    "sakin": "ui",
+    "enerjik": "default",
+    "düşünceli": "ui",
+    "kararsız": "default",
+    "karmaşık": "default"
+}
+
+# Colormind'a ulaşılamadığında ve havuz boş olduğunda kullanılan gri palet.
+DEFAULT_COLOR_PALETTE = ["#D3D3D3", "#A9A9A9", "#808080", "#696969"]
+
+
+async def _fetch_colormind_palette(model: str) -> list[str] | None:
+    """Colormind API'sinden verilen model için 4 renkli bir HEX paleti ister."""
+    async def _post():
+        client = get_http_client("colormind")
+        response = await client.post("/api/", json={"model": model})
+        response.raise_for_status()
+        return response.json()
+
+    try:
+        data = await get_breaker("colormind").call(_post)
+        rgb_palette = data.get("result", [])
+        hex_palette = [f"#{r:02x}{g:02x}{b:02x}" for r, g, b in rgb_palette]
+        return hex_palette[:4] or None
+    except Exception as e:
+        logger.warning("Colormind API hatası: %s", e)
+        return None
+
+
+class PaletteReservoir:
+    """
+    Her Colormind modeli için önceden çekilmiş paletlerden oluşan bir havuz.
+
+    İstekler havuzdan anında bir palet alır. Havuzdaki palet sayısı
+    `low_watermark` altına düştüğünde arka planda bir doldurma görevi
+    başlatılır ve havuz `capacity` değerine kadar tamamlanır. Her palet
+    yalnızca bir kez verilir.
+    """
+
+    def __init__(self, models: set[str], capacity: int, low_watermark: int):
+        self.capacity = capacity
+        self.low_watermark = low_watermark
+        self._palettes = {model: deque(maxlen=capacity) for model in models}
+        self._refill_tasks: dict[str, asyncio.Task] = {}
+
+    def _schedule_refill(self, model: str) -> None:
+        task = self._refill_tasks.get(model)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            self._refill_tasks[model] = asyncio.create_task(self._refill(model))
+
+    async def _refill(self, model: str) -> None:
+        palettes = self._palettes[model]
+        while len(palettes) < self.capacity:
+            palette = await _fetch_colormind_palette(model)
+            if palette is None:
+                # Colormind'a şu an ulaşılamıyor; bir sonraki pop yeniden dener.
+                break
+            palettes.append(palette)
+
+    def pop(self, model: str) -> list[str] | None:
+        """Havuzdan bir palet alır; havuz boşsa None döner."""
+        palettes = self._palettes.setdefault(model, deque(maxlen=self.capacity))
+        palette = palettes.popleft() if palettes else None
+        if len(palettes) < self.low_watermark:
+            self._schedule_refill(model)
+        return palette
+
+    def start(self) -> None:
+        """Tüm modeller için havuzu arka planda doldurmaya başlar."""
+        for model in self._palettes:
+            self._schedule_refill(model)
+
+    async def stop(self) -> None:
+        """Devam eden doldurma görevlerini iptal eder."""
+        tasks = [task for task in self._refill_tasks.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refill_tasks.clear()
+
+
+palette_reservoir = PaletteReservoir(
+    models=set(MOOD_TO_COLORMIND_MODEL.values()),
+    capacity=settings.PALETTE_RESERVOIR_SIZE,
+    low_watermark=settings.PALETTE_RESERVOIR_LOW_WATERMARK,
+)
+
+
+async def generate_palette_from_colormind(mood_label: str) -> list[str]:
+    """
+    Duyguya uygun, Colormind tabanlı bir renk paleti döndürür.
+    Palet öncelikle önceden doldurulmuş havuzdan alınır; havuz boşsa Colormind'a
+    doğrudan istek atılır, o da başarısız olursa gri palete düşülür.
+    """
+    model = MOOD_TO_COLORMIND_MODEL.get(mood_label, "default")
+    palette = palette_reservoir.pop(model)
+    if palette is None:
+        palette = await _fetch_colormind_palette(model)
+    return palette or list(DEFAULT_COLOR_PALETTE)
@@ -21,6 +21,8 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # SQL sorgularını log'a yazar (yalnızca geliştirme sırasında açın)
+    DB_ECHO: bool = False
     
     # Harici Servis API Anahtarları (opsiyonel)
     GOOGLE_API_KEY: str = ""
@@ -35,6 +37,108 @@ class Settings(BaseSettings):
     # Yapay Zeka Servisi (text-generation-webui)
     AI_SERVICE_URL: str = "http://127.0.0.1:5000"
 
+    # Duygu sınıflandırma kaskadı: emoji, anahtar kelime ve embedding katmanlarından
+    # biri bu güven eşiğini geçerse yerel LLM çağrılmaz.
+    MOOD_CASCADE_ENABLED: bool = True
+    MOOD_CASCADE_THRESHOLD: float = 0.75
+    # Eşiğin altında tutulur: emoji tek başına karar vermez, anahtar kelime ve
+    # embedding katmanlarında ve LLM prompt'unda güçlü bir ön bilgi olarak metinle
+    # birleştirilir. "emoji" katman sayacı yalnızca bu değer eşiğe eşit veya
+    # büyük ayarlanırsa (emoji tek başına karar verirse) artar.
+    MOOD_EMOJI_CONFIDENCE: float = 0.6
+    MOOD_CENTROID_TEMPERATURE: float = 0.05
+    # Duygu etiketi önbelleği: bellek içi LRU kapasitesi ve isteğe bağlı, yeniden
+    # başlatmalardan sonra da korunan SQLite dosyası (boş bırakılırsa kapalı).
+    MOOD_CACHE_SIZE: int = 10000
+    MOOD_CACHE_SQLITE_PATH: str = ""
+    # Eşzamanlı LLM sınıflandırma isteklerini toplu gönderme: pencere süresi (ms)
+    # ve tek istekteki en fazla metin sayısı
+    MOOD_BATCH_ENABLED: bool = True
+    MOOD_BATCH_WINDOW_MS: float = 20.0
+    MOOD_BATCH_MAX_SIZE: int = 8
+
+    # /analyze isteği için toplam süre bütçesi (saniye). Sınıflandırmadan sonra
+    # paralel çalışan aşamalar (palet, motto, playlist) bu süreyi aşarsa
+    # varsayılan değerlerine düşer.
+    ANALYZE_DEADLINE_SECONDS: float = 10.0
+
+    # Duygu başına önceden üretilmiş öneri paketleri: dış servisler süre
+    # bütçesini aştığında veya hızlı mod istendiğinde bu havuzdan sunulur.
+    # Yenileme aralığı 0 ise paketler yalnızca çevrimdışı üretilir.
+    SUGGESTION_BUNDLES_PATH: str = str(BACKEND_DIR / "db" / "suggestion_bundles.json")
+    SUGGESTION_BUNDLES_PER_MOOD: int = 10
+    SUGGESTION_BUNDLES_REFRESH_SECONDS: float = 6 * 60 * 60
+    # Arka plan yenilemesi açılıştan bu kadar sonra başlar ve canlı trafikle
+    # yarışmasın diye aynı anda en fazla bu kadar paket üretir. Birden fazla
+    # worker varsa yenilemeyi kilit dosyasını alan tek süreç yapar.
+    SUGGESTION_BUNDLES_INITIAL_DELAY_SECONDS: float = 120.0
+    SUGGESTION_BUNDLES_BUILD_CONCURRENCY: int = 2
+
+    # Arka planda çalışan analiz işleri: işçi sayısı, kuyruk kapasitesi ve
+    # tamamlanan işlerin sorgulanabileceği süre (saniye). İşler süreç belleğinde
+    # tutulur; /analyze/jobs yalnızca tek worker'lı sunucuda (--workers 1) çalışır.
+    ANALYSIS_JOB_WORKERS: int = 4
+    ANALYSIS_JOB_QUEUE_SIZE: int = 100
+    ANALYSIS_JOB_RESULT_TTL: float = 60 * 60
+
+    # Dış servis adresleri ve servis başına zaman aşımları (saniye)
+    COLORMIND_API_URL: str = "http://colormind.io"
+    COLORMIND_TIMEOUT: float = 15.0
+    # Renk paletlerinin kaynağı: "colormind" (dış API) veya "local" (NumPy ile
+    # duygu profillerinden yerel üretim, bkz. core/palette_engine.py)
+    PALETTE_SOURCE: str = "colormind"
+    # Colormind model başına önceden çekilen palet havuzu: havuz LOW_WATERMARK
+    # altına düştüğünde arka planda SIZE değerine kadar doldurulur.
+    PALETTE_RESERVOIR_SIZE: int = 20
+    PALETTE_RESERVOIR_LOW_WATERMARK: int = 5
+    SPOTIFY_ACCOUNTS_URL: str = "https://accounts.spotify.com"
+    SPOTIFY_API_URL: str = "https://api.spotify.com"
+    SPOTIFY_TIMEOUT: float = 15.0
+    # Token süresi dolmadan kaç saniye önce arka planda yenilensin
+    SPOTIFY_TOKEN_REFRESH_MARGIN: float = 300.0
+    # Arama terimi başına playlist adaylarının önbellek süreleri (saniye):
+    # TTL dolduktan sonra STALE_TTL boyunca eski sonuç sunulup arka planda yenilenir.
+    SPOTIFY_PLAYLIST_CACHE_TTL: float = 6 * 60 * 60
+    SPOTIFY_PLAYLIST_CACHE_STALE_TTL: float = 24 * 60 * 60
+
+    # Gemini çağrıları: süreç genelinde eşzamanlılık sınırı, kuyrukta bekleme
+    # ve üretim için zaman aşımları (saniye)
+    GEMINI_API_ENDPOINT: str = ""  # boşsa Google'ın varsayılan uç noktası kullanılır
+    GEMINI_MAX_CONCURRENCY: int = 4
+    GEMINI_QUEUE_TIMEOUT_SECONDS: float = 5.0
+    GEMINI_TIMEOUT_SECONDS: float = 8.0
+
+    # Dış servis devre kesicileri: art arda bu kadar hata veya yavaş çağrıdan sonra
+    # devre OPEN_SECONDS boyunca açılır ve çağrılar varsayılan değerlere düşer.
+    # Yavaşlık eşikleri servis başına saniye cinsindendir.
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_OPEN_SECONDS: float = 30.0
+    CIRCUIT_SLOW_CALL_SECONDS: dict[str, float] = {
+        "colormind": 3.0,
+        "spotify": 3.0,
+        "gemini": 6.0,
+        "llm": 10.0,
+    }
+    # Spotify araması bu süre içinde dönmezse ikinci bir istek başlatılır (0 = kapalı)
+    SPOTIFY_SEARCH_HEDGE_DELAY: float = 0.0
+
+    # Paylaşılan HTTP istemci havuzu ayarları (servis başına bir havuz)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP2_ENABLED: bool = True
+
+    # Loglama: kök seviye, modül bazlı seviyeler, çıktı biçimi ("json" veya "text")
+    # ve ayrıntılı yüklerin (ham API yanıtları) örneklenme oranı
+    LOG_LEVEL: str = "INFO"
+    LOG_MODULE_LEVELS: dict[str, str] = {
+        "httpx": "WARNING",
+        "httpcore": "WARNING",
+        "sqlalchemy.engine": "WARNING",
+    }
+    LOG_FORMAT: str = "json"
+    LOG_PAYLOAD_SAMPLE_RATE: float = 0.01
+
     BACKEND_CORS_ORIGINS: list[str] = ["http://localhost:3000", "http://localhost:3001"]
 
     model_config = SettingsConfigDict(
@@ -1,9 +1,18 @@
 # backend/core/gemini_service.py
 
 import os
+import time
+import asyncio
+import logging
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from .circuit_breaker import get_breaker
+from .config import settings
+from .metrics import observe_stage
+
+logger = logging.getLogger(__name__)
+
 # .env dosyasındaki değişkenleri yükle
 load_dotenv()
 
@@ -13,7 +22,15 @@ api_key = os.getenv("GEMINI_API_KEY")
 if not api_key:
     raise ValueError("GEMINI_API_KEY bulunamadı. Lütfen .env dosyasını kontrol edin.")
 
-genai.configure(api_key=api_key)
+if settings.GEMINI_API_ENDPOINT:
+    # Yerel test/benchmark sunucusu gibi farklı bir uç noktaya REST ile bağlan.
+    genai.configure(
+        api_key=api_key,
+        transport="rest",
+        client_options={"api_endpoint": settings.GEMINI_API_ENDPOINT},
+    )
+else:
+    genai.configure(api_key=api_key)
 
 # Model ayarları
 generation_config = {
@@ -29,11 +46,11 @@ model = genai.GenerativeModel(
     generation_config=generation_config,
 )
 
-def generate_inspiration_with_gemini(user_input: str) -> str:
-    """
-    Kullanıcının girdisine dayanarak Gemini API'sini kullanarak ilham verici bir metin üretir.
-    """
-    prompt = f"""
+GEMINI_FALLBACK_MESSAGE = "İlham verici bir mesaj üretirken bir sorunla karşılaştım. Lütfen daha sonra tekrar deneyin."
+
+
+def _build_inspiration_prompt(user_input: str) -> str:
+    return f"""
     Sen kullanıcıların duygularına, ruh hallerine ve iç dökümlerine göre onlara özel, yumuşak, sıcak, içten ve ilham verici mesajlar yazan bir yapay zekâ asistanısın.
 
     Görevin, kullanıcıya kendini anlaşılmış hissettirmek ve içini biraz olsun hafifletmek. Mesajların tıpkı bir yakın arkadaşın sarılırcasına söyledikleri gibi olmalı. Çok resmi veya aşırı motive edici değil, daha çok yüreğe dokunan türden olmalı.
@@ -43,13 +60,127 @@ def generate_inspiration_with_gemini(user_input: str) -> str:
 
     Buna karşılık, onun yüreğine dokunacak kısa bir ilham mesajı yaz (en fazla 2 cümle). Cevabın sadece mesaj olsun, açıklama yapma. Gerekirse emoji kullanabilirsin ama abartma.
     """
+
+
+def _response_text(response) -> str:
+    # Gemini bazen cevabı "parts" içinde sarmalayabilir. Güvenli erişim sağlayalım.
+    if response.parts:
+        return ''.join(part.text for part in response.parts)
+    return response.text
+
+
+def generate_inspiration_with_gemini(user_input: str) -> str:
+    """
+    Kullanıcının girdisine dayanarak Gemini API'sini kullanarak ilham verici bir metin üretir.
+    Senkron çalışır; async kod içinden `generate_inspiration_with_gemini_async` kullanılmalıdır.
+    """
+    prompt = _build_inspiration_prompt(user_input)
     
     try:
         response = model.generate_content(prompt)
-        # Gemini bazen cevabı "parts" içinde sarmalayabilir. Güvenli erişim sağlayalım.
-        if response.parts:
-            return ''.join(part.text for part in response.parts)
-        return response.text
+        return _response_text(response)
+    except Exception as e:
+        logger.error("Gemini API hatası: %s", e)
+        return GEMINI_FALLBACK_MESSAGE
+
+
+class GeminiLimiter:
+    """
+    Süreç genelinde eşzamanlı Gemini çağrılarını `max_concurrency` ile sınırlar
+    ve kuyrukta bekleme sürelerini, zaman aşımlarını ve hataları sayar.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.calls = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self.queue_timeouts = 0
+        self.generation_timeouts = 0
+        self.errors = 0
+        self.total_queue_seconds = 0.0
+        self.max_queue_seconds = 0.0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Semaphore bir olay döngüsüne bağlıdır; zamanlayıcı gibi ayrı döngülerde
+        # çalışan kod için yeni bir tane oluşturulur.
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def generate(self, prompt: str, queue_timeout: float, timeout: float) -> str:
+        semaphore = self._get_semaphore()
+        enqueued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=queue_timeout)
+        except asyncio.TimeoutError:
+            self.queue_timeouts += 1
+            raise
+        finally:
+            self.waiting -= 1
+
+        queue_seconds = time.perf_counter() - enqueued_at
+        self.calls += 1
+        self.total_queue_seconds += queue_seconds
+        self.max_queue_seconds = max(self.max_queue_seconds, queue_seconds)
+        observe_stage("gemini_queue", queue_seconds)
+        self.in_flight += 1
+        try:
+            response = await get_breaker("gemini").call(
+                lambda: asyncio.wait_for(
+                    model.generate_content_async(prompt, request_options={"timeout": timeout}),
+                    timeout=timeout,
+                )
+            )
+            return _response_text(response)
+        except asyncio.TimeoutError:
+            self.generation_timeouts += 1
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "calls": self.calls,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "queue_timeouts": self.queue_timeouts,
+            "generation_timeouts": self.generation_timeouts,
+            "errors": self.errors,
+            "avg_queue_seconds": self.total_queue_seconds / self.calls if self.calls else 0.0,
+            "max_queue_seconds": self.max_queue_seconds,
+        }
+
+
+gemini_limiter = GeminiLimiter(max_concurrency=settings.GEMINI_MAX_CONCURRENCY)
+
+
+async def generate_inspiration_with_gemini_async(user_input: str) -> str:
+    """
+    `generate_inspiration_with_gemini` fonksiyonunun olay döngüsünü bloklamayan
+    sürümü. SDK'nın async API'sini kullanır; eşzamanlı çağrı sayısı
+    `GEMINI_MAX_CONCURRENCY` ile sınırlanır.
+    """
+    prompt = _build_inspiration_prompt(user_input)
+    try:
+        return await gemini_limiter.generate(
+            prompt,
+            queue_timeout=settings.GEMINI_QUEUE_TIMEOUT_SECONDS,
+            timeout=settings.GEMINI_TIMEOUT_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        logger.warning("Gemini API zaman aşımına uğradı.")
+        return GEMINI_FALLBACK_MESSAGE
     except Exception as e:
-        print(f"Gemini API hatası: {e}")
-        return "İlham verici bir mesaj üretirken bir sorunla karşılaştım. Lütfen daha sonra tekrar deneyin."
+        logger.error("Gemini API hatası: %s", e)
+        return GEMINI_FALLBACK_MESSAGE
@@ -0,0 +1,98 @@
+import logging
+from contextlib import asynccontextmanager
+
+import httpx
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 desteği için `h2` paketi gerekir; kurulu değilse HTTP/1.1 ile devam ederiz.
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def _upstreams() -> dict[str, dict]:
+    """Dış servislerin adres, protokol ve zaman aşımı ayarlarını döndürür."""
+    return {
+        # Colormind yalnızca düz http üzerinden hizmet verdiği için HTTP/2 kullanılamaz.
+        "colormind": {
+            "base_url": settings.COLORMIND_API_URL,
+            "http2": False,
+            "timeout": settings.COLORMIND_TIMEOUT,
+        },
+        "spotify_accounts": {
+            "base_url": settings.SPOTIFY_ACCOUNTS_URL,
+            "http2": True,
+            "timeout": settings.SPOTIFY_TIMEOUT,
+        },
+        "spotify_api": {
+            "base_url": settings.SPOTIFY_API_URL,
+            "http2": True,
+            "timeout": settings.SPOTIFY_TIMEOUT,
+        },
+    }
+
+
+_clients: dict[str, httpx.AsyncClient] = {}
+
+
+def _create_client(name: str) -> httpx.AsyncClient:
+    upstream = _upstreams()[name]
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(
+        base_url=upstream["base_url"],
+        http2=upstream["http2"] and settings.HTTP2_ENABLED and HTTP2_AVAILABLE,
+        limits=limits,
+        timeout=httpx.Timeout(upstream["timeout"]),
+    )
+
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    """
+    Verilen servis için paylaşılan, keep-alive havuzlu istemciyi döndürür.
+    Havuzlar `http_client_pools()` ile açılır; açılmamışsa (örn. tek başına
+    çalıştırılan bir betikte) istemci ilk kullanımda oluşturulur.
+    """
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _create_client(name)
+        _clients[name] = client
+    return client
+
+
+async def open_http_clients() -> None:
+    """Tüm dış servisler için bağlantı havuzlarını açar."""
+    for name in _upstreams():
+        get_http_client(name)
+    logger.info("HTTP istemci havuzları açıldı: %s", ", ".join(_clients))
+
+
+async def close_http_clients() -> None:
+    """Açık bağlantı havuzlarını kapatır."""
+    while _clients:
+        _, client = _clients.popitem()
+        await client.aclose()
+
+
+@asynccontextmanager
+async def http_client_pools():
+    """
+    Bağlantı havuzlarını bir bağlam boyunca açık tutar. Havuzlar zaten açıksa
+    (örn. FastAPI lifespan içinde) mevcut havuzlar kullanılır ve kapatılmaz.
+    """
+    owner = not _clients
+    if owner:
+        await open_http_clients()
+    try:
+        yield
+    finally:
+        if owner:
+            await close_http_clients()
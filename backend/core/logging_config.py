@@ -0,0 +1,114 @@
+import atexit
+import copy
+import datetime
+import json
+import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+
+from .config import settings
+
+# LogRecord'un kendi alanları; bunların dışındaki `extra` alanları yapılandırılmış
+# çıktıya eklenir.
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: QueueListener | None = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Her kaydı `extra` alanlarıyla birlikte tek satırlık bir JSON nesnesi olarak biçimlendirir."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = {
+            "time": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                event[key] = value
+        if record.exc_info:
+            event["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+
+class PayloadSamplingFilter(logging.Filter):
+    """
+    `extra={"payload": ...}` ile gönderilen ayrıntılı kayıtların (ham API
+    yanıtları gibi) yalnızca `sample_rate` oranındakini geçirir; diğer kayıtlara
+    dokunmaz.
+    """
+
+    def __init__(self, sample_rate: float):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "payload", None) is None:
+            return True
+        return random.random() < self.sample_rate
+
+
+class _InProcessQueueHandler(QueueHandler):
+    """
+    Kayıtları biçimlendirmeden kuyruğa atar. Dinleyici aynı süreçte çalıştığı
+    için kaydın serileştirilmesine gerek yoktur; yalnızca mesaj argümanları
+    çözülür ve asıl biçimlendirme (traceback dahil) dinleyici thread'inde yapılır.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logging() -> None:
+    """
+    Kök logger'ı kuyruk tabanlı, bloklamayan bir hatta bağlar.
+
+    Uygulama kodu kayıtları yalnızca bir kuyruğa ekler; stdout'a yazma işi
+    ayrı bir `QueueListener` thread'inde yapılır. Modül bazlı seviyeler
+    `LOG_MODULE_LEVELS`, ayrıntılı yük örneklemesi `LOG_PAYLOAD_SAMPLE_RATE`
+    ve SQL çıktısı `DB_ECHO` ile ayarlanır. Birden fazla çağrılması güvenlidir.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler()
+    if settings.LOG_FORMAT == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _InProcessQueueHandler(log_queue)
+    queue_handler.addFilter(PayloadSamplingFilter(settings.LOG_PAYLOAD_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    for name, level in settings.LOG_MODULE_LEVELS.items():
+        logging.getLogger(name).setLevel(level.upper())
+    # SQLAlchemy'nin `echo=True` seçeneği kendi senkron handler'ını eklediği
+    # için SQL çıktısı bunun yerine logger seviyesiyle kuyruğa yönlendirilir.
+    if settings.DB_ECHO:
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Kuyrukta kalan kayıtları yazar ve dinleyici thread'ini durdurur."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,133 @@
+import functools
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+
+# /analyze hattındaki aşamaların süreleri. Kovalar, önbellekten dönen
+# milisaniyelik yanıtlardan dış servis zaman aşımlarına kadar uzanır.
+STAGE_LATENCY = Histogram(
+    "moodmuse_stage_latency_seconds",
+    "Aşama başına gecikme (saniye)",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0),
+)
+STAGE_ERRORS = Counter(
+    "moodmuse_stage_errors_total",
+    "Aşama başına hata sayısı",
+    ["stage"],
+)
+STAGE_IN_FLIGHT = Gauge(
+    "moodmuse_stage_in_flight",
+    "Aşama başına o an devam eden çağrı sayısı",
+    ["stage"],
+)
+
+# Etiket çözümlemesi her çağrıda tekrarlanmasın diye alt metrikler önbelleğe alınır.
+_children: dict[str, tuple] = {}
+
+
+def _stage_metrics(stage: str) -> tuple:
+    children = _children.get(stage)
+    if children is None:
+        children = (
+            STAGE_LATENCY.labels(stage),
+            STAGE_ERRORS.labels(stage),
+            STAGE_IN_FLIGHT.labels(stage),
+        )
+        _children[stage] = children
+    return children
+
+
+@contextmanager
+def track_stage(stage: str):
+    """Bir kod bloğunun süresini, hatalarını ve eşzamanlılığını `stage` adıyla kaydeder."""
+    latency, errors, in_flight = _stage_metrics(stage)
+    in_flight.inc()
+    started_at = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        errors.inc()
+        raise
+    finally:
+        latency.observe(time.perf_counter() - started_at)
+        in_flight.dec()
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """Başka yerde ölçülmüş bir süreyi (örn. kuyrukta bekleme) kaydeder."""
+    _stage_metrics(stage)[0].observe(seconds)
+
+
+def timed(stage: str):
+    """Async fonksiyonlar için `track_stage` dekoratörü."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with track_stage(stage):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _ServiceStatsCollector:
+    """
+    Bileşenlerin kendi tuttuğu sayaçları (sınıflandırma katmanları, önbellek,
+    Gemini kuyruğu, devre kesiciler, iş kuyruğu) yalnızca kazıma (scrape)
+    anında okuyarak Prometheus metriklerine dönüştürür.
+    """
+
+    def describe(self):
+        # Kayıt sırasında collect() çağrılıp servis modülleri erkenden
+        # (döngüsel olarak) içe aktarılmasın diye boş tanım döndürülür.
+        return []
+
+    def collect(self):
+        from .analysis_jobs import analysis_job_queue
+        from .circuit_breaker import breaker_stats
+        from .gemini_service import gemini_limiter
+        from .mood_classifier import classification_stats
+
+        stats = classification_stats()
+        tier_hits = GaugeMetricFamily(
+            "moodmuse_mood_tier_hits", "Duygu sınıflandırmasını karşılayan katman sayıları", labels=["tier"]
+        )
+        for tier, hits in stats["hits"].items():
+            tier_hits.add_metric([tier], hits)
+        yield tier_hits
+
+        cache = GaugeMetricFamily(
+            "moodmuse_mood_cache", "Duygu etiketi önbelleği istatistikleri", labels=["field"]
+        )
+        for field in ("size", "hits", "sqlite_hits", "misses"):
+            cache.add_metric([field], stats["cache"][field])
+        yield cache
+
+        gemini = GaugeMetricFamily(
+            "moodmuse_gemini_limiter", "Gemini eşzamanlılık sınırlayıcısı istatistikleri", labels=["field"]
+        )
+        for field, value in gemini_limiter.stats().items():
+            gemini.add_metric([field], value)
+        yield gemini
+
+        breakers = GaugeMetricFamily(
+            "moodmuse_circuit_open", "Devre kesici açık mı (1) kapalı mı (0)", labels=["upstream"]
+        )
+        for name, breaker in breaker_stats().items():
+            breakers.add_metric([name], 0 if breaker["state"] == "closed" else 1)
+        yield breakers
+
+        yield GaugeMetricFamily(
+            "moodmuse_analysis_job_queue_depth", "Kuyrukta bekleyen analiz işi sayısı",
+            value=analysis_job_queue.depth,
+        )
+
+
+REGISTRY.register(_ServiceStatsCollector())
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Tüm metrikleri Prometheus metin biçiminde ve içerik türüyle döndürür."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
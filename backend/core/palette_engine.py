@@ -0,0 +1,92 @@
+import numpy as np
+
+from .colormind_service import MOOD_TO_COLORMIND_MODEL
+
+# Renk uyumu şemaları: paletteki her renk için ana tona eklenen açı (derece).
+HARMONY_OFFSETS = {
+    "analogous": (0.0, 20.0, -20.0, 40.0),
+    "complementary": (0.0, 180.0, 15.0, 195.0),
+    "triadic": (0.0, 120.0, 240.0, 30.0),
+    "monochrome": (0.0, 0.0, 0.0, 0.0),
+}
+
+# Colormind modeline göre temel karakter: "ui" modeline eşlenen duygular
+# (üzgün, sakin, düşünceli) yumuşak ve düşük doygunluklu, "default" modeline
+# eşlenenler daha canlı paletler alır.
+_MODEL_BASE = {
+    "ui": {"saturation": (0.20, 0.45), "lightness": (0.35, 0.85), "harmony": "analogous"},
+    "default": {"saturation": (0.55, 0.90), "lightness": (0.40, 0.70), "harmony": "complementary"},
+}
+
+# Duygu başına ana ton (derece) ve tonun paletten palete ne kadar sapabileceği.
+_MOOD_HUES = {
+    "mutlu": (50.0, 15.0),
+    "üzgün": (220.0, 15.0),
+    "kızgın": (5.0, 10.0),
+    "şaşkın": (290.0, 25.0),
+    "sakin": (170.0, 20.0),
+    "enerjik": (25.0, 15.0),
+    "düşünceli": (250.0, 20.0),
+    "kararsız": (90.0, 60.0),
+    "karmaşık": (0.0, 180.0),
+}
+
+# Ana karakterden ayrılan duygular için özel ayarlar.
+_MOOD_OVERRIDES = {
+    "kararsız": {"harmony": "triadic", "saturation": (0.35, 0.65)},
+    "karmaşık": {"harmony": "triadic"},
+    "düşünceli": {"harmony": "monochrome"},
+}
+
+MOOD_HSL_PROFILES = {
+    mood: {
+        **_MODEL_BASE[model],
+        "hue": _MOOD_HUES[mood][0],
+        "hue_spread": _MOOD_HUES[mood][1],
+        **_MOOD_OVERRIDES.get(mood, {}),
+    }
+    for mood, model in MOOD_TO_COLORMIND_MODEL.items()
+}
+
+_rng = np.random.default_rng()
+
+
+def hsl_to_rgb(hsl: np.ndarray) -> np.ndarray:
+    """
+    `(..., 3)` biçimindeki HSL dizisini (ton derece, doygunluk ve açıklık 0-1)
+    aynı biçimde 0-255 aralığında uint8 RGB dizisine çevirir.
+    """
+    hue, saturation, lightness = hsl[..., 0], hsl[..., 1], hsl[..., 2]
+    chroma = (1 - np.abs(2 * lightness - 1)) * saturation
+    # Her kanal için standart HSL formülü: f(n) = L - a * max(-1, min(k - 3, 9 - k, 1))
+    k = (np.array([0.0, 8.0, 4.0]) + hue[..., None] / 30.0) % 12
+    rgb = lightness[..., None] - (chroma / 2)[..., None] * np.clip(np.minimum(k - 3, 9 - k), -1, 1)
+    return np.round(rgb * 255).astype(np.uint8)
+
+
+def generate_palettes(mood_label: str, count: int, size: int = 4, rng: np.random.Generator | None = None) -> np.ndarray:
+    """
+    Duygu profiline göre `count` adet, `size` renkli paleti tek seferde üretir.
+    `(count, size, 3)` biçiminde uint8 RGB dizisi döndürür.
+    """
+    rng = rng or _rng
+    profile = MOOD_HSL_PROFILES.get(mood_label, MOOD_HSL_PROFILES["karmaşık"])
+    offsets = np.resize(np.array(HARMONY_OFFSETS[profile["harmony"]]), size)
+
+    base_hue = rng.normal(profile["hue"], profile["hue_spread"] / 2, size=(count, 1))
+    hue = (base_hue + offsets + rng.normal(0, 4, size=(count, size))) % 360
+    saturation = rng.uniform(*profile["saturation"], size=(count, size))
+    # Açıklık değerleri sıralanarak koyudan açığa giden bir palet elde edilir.
+    lightness = np.sort(rng.uniform(*profile["lightness"], size=(count, size)), axis=1)
+
+    return hsl_to_rgb(np.stack([hue, saturation, lightness], axis=-1))
+
+
+def to_hex(palettes: np.ndarray) -> list[list[str]]:
+    """`(count, size, 3)` RGB dizisini HEX renk listelerine çevirir."""
+    return [[f"#{r:02x}{g:02x}{b:02x}" for r, g, b in palette] for palette in palettes.tolist()]
+
+
+def generate_local_palette(mood_label: str) -> list[str]:
+    """Duyguya uygun tek bir HEX paleti yerel olarak üretir (ağ çağrısı yapmaz)."""
+    return to_hex(generate_palettes(mood_label, count=1))[0]
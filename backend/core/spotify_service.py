@@ -1,14 +1,21 @@
 import httpx
 import base64
+import logging
 import random
+import asyncio
+import time
+from .circuit_breaker import CircuitOpenError, get_breaker, hedged
 from .config import settings
+from .http_clients import get_http_client
 
-# Daha uzun bekleme süresi için bir timeout sabiti tanımlayalım
-SPOTIFY_TIMEOUT = 15.0
+logger = logging.getLogger(__name__)
 
-async def get_spotify_access_token() -> str | None:
-    """Spotify API için bir erişim token'ı alır."""
-    auth_url = "https://accounts.spotify.com/api/token"
+async def _request_spotify_access_token() -> tuple[str | None, float]:
+    """
+    Spotify'dan yeni bir client-credentials token'ı ister.
+    Token ve geçerlilik süresi (saniye) döndürülür.
+    """
+    auth_url = "/api/token"
     auth_header = base64.b64encode(
         f"{settings.SPOTIFY_CLIENT_ID}:{settings.SPOTIFY_CLIENT_SECRET}".encode("utf-8")
     ).decode("utf-8")
@@ -16,79 +23,234 @@ async def get_spotify_access_token() -> str | None:
     auth_data = {"grant_type": "client_credentials"}
     headers = {"Authorization": f"Basic {auth_header}"}
     
-    async with httpx.AsyncClient(timeout=SPOTIFY_TIMEOUT) as client:
-        try:
-            response = await client.post(auth_url, data=auth_data, headers=headers)
-            response.raise_for_status()
-            return response.json().get("access_token")
-        except httpx.TimeoutException:
-            print("Spotify token alırken zaman aşımı hatası oluştu.")
-            return None
-        except httpx.HTTPStatusError as e:
-            print(f"Spotify token alınırken hata: {e}")
-            return None
+    async def _post():
+        client = get_http_client("spotify_accounts")
+        response = await client.post(auth_url, data=auth_data, headers=headers)
+        response.raise_for_status()
+        return response.json()
 
-async def search_spotify_playlist(search_query: str, token: str) -> str | None:
+    try:
+        data = await get_breaker("spotify").call(_post)
+        return data.get("access_token"), float(data.get("expires_in", 3600))
+    except CircuitOpenError:
+        logger.warning("Spotify devresi açık, token isteği atlandı.")
+        return None, 0.0
+    except httpx.TimeoutException:
+        logger.warning("Spotify token alırken zaman aşımı hatası oluştu.")
+        return None, 0.0
+    except httpx.HTTPStatusError as e:
+        logger.error("Spotify token alınırken hata: %s", e)
+        return None, 0.0
+
+
+class SpotifyTokenManager:
     """
-    Verilen arama sorgusuna göre Spotify'da arama yapar, en alakalı çalma listelerini
-    puanlar ve en iyiler arasından rastgele birini seçer.
+    Spotify erişim token'ını `expires_in` süresine göre önbellekte tutar.
+
+    Süresi dolmak üzere olan token arka planda yenilenirken mevcut token
+    kullanılmaya devam eder. Aynı anda gelen yenileme ihtiyaçları tek bir
+    istek üzerinde birleştirilir (single-flight).
+    """
+
+    def __init__(self, refresh_margin: float):
+        self.refresh_margin = refresh_margin
+        self._token: str | None = None
+        self._expires_at = 0.0
+        self._refresh_task: asyncio.Task | None = None
+
+    def _refresh(self) -> asyncio.Task:
+        # Devam eden bir yenileme varsa ona katıl. Görev başka bir olay döngüsüne
+        # aitse (örn. zamanlayıcının asyncio.run çağrısı) yeni bir görev başlat.
+        task = self._refresh_task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.create_task(self._fetch())
+            # Arka planda (kimse beklemeden) başarısız olan yenilemeler de loglansın.
+            task.add_done_callback(self._log_refresh_failure)
+            self._refresh_task = task
+        return task
+
+    def _log_refresh_failure(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Spotify token'ı yenilenemedi: %s", task.exception())
+
+    async def _fetch(self) -> str | None:
+        token, expires_in = await _request_spotify_access_token()
+        if token:
+            self._token = token
+            self._expires_at = time.monotonic() + expires_in
+        return token
+
+    async def get_token(self) -> str | None:
+        now = time.monotonic()
+        if self._token and now < self._expires_at:
+            if now >= self._expires_at - self.refresh_margin:
+                # Süre dolmadan arka planda yenile; bu istek beklemez.
+                self._refresh()
+            return self._token
+        # Bir isteğin iptal edilmesi, ortak yenileme görevini iptal etmemeli.
+        return await asyncio.shield(self._refresh())
+
+    def invalidate(self) -> None:
+        """Önbellekteki token'ı geçersiz kılar (örn. 401 yanıtından sonra)."""
+        self._token = None
+        self._expires_at = 0.0
+
+
+token_manager = SpotifyTokenManager(refresh_margin=settings.SPOTIFY_TOKEN_REFRESH_MARGIN)
+
+
+async def get_spotify_access_token() -> str | None:
+    """Spotify API için önbellekteki veya yeni alınan bir erişim token'ı döndürür."""
+    return await token_manager.get_token()
+
+class SpotifyFetchError(Exception):
+    """Spotify araması zaman aşımı veya HTTP hatasıyla sonuçlandığında fırlatılır."""
+
+
+async def _fetch_playlist_candidates(search_query: str, token: str) -> list[dict]:
+    """
+    Spotify'da arama yapar, çalma listelerini puanlar ve en iyi adayları
+    `{"name": ..., "url": ...}` sözlükleri olarak döndürür.
     """
-    search_url = "https://api.spotify.com/v1/search"
+    search_url = "/v1/search"
     headers = {"Authorization": f"Bearer {token}"}
     limit = 20
     params = {"q": f"{search_query}", "type": "playlist", "limit": limit}
     
-    async with httpx.AsyncClient(timeout=SPOTIFY_TIMEOUT) as client:
-        try:
-            response = await client.get(search_url, headers=headers, params=params)
-            response.raise_for_status()
-            
-            print(f"Spotify API yanıtı (status: {response.status_code}): {response.text}") # LOG: API yanıtı
-            playlists_data = response.json().get("playlists", {})
-            playlists = playlists_data.get("items", [])
-            print(f"Spotify API'den gelen çalma listeleri sayısı: {len(playlists)}") # LOG: çalma listesi sayısı
+    async def _get():
+        client = get_http_client("spotify_api")
+        response = await client.get(search_url, headers=headers, params=params)
+        response.raise_for_status()
+        return response
+
+    try:
+        # Arama idempotent olduğu için yavaş kalan isteğe paralel ikinci bir
+        # istek (hedge) gönderilebilir.
+        response = await get_breaker("spotify").call(
+            lambda: hedged(_get, settings.SPOTIFY_SEARCH_HEDGE_DELAY)
+        )
+    except CircuitOpenError as e:
+        logger.warning("Spotify devresi açık, arama atlandı.")
+        raise SpotifyFetchError(str(e)) from e
+    except httpx.TimeoutException as e:
+        logger.warning("Spotify'da çalma listesi aranırken zaman aşımı hatası oluştu.")
+        raise SpotifyFetchError(str(e)) from e
+    except httpx.HTTPStatusError as e:
+        logger.error("Spotify'da arama yapılırken hata: %s", e)
+        if e.response.status_code == 401:
+            token_manager.invalidate()
+        raise SpotifyFetchError(str(e)) from e
+
+    playlists_data = response.json().get("playlists", {})
+    playlists = playlists_data.get("items", [])
+    # Ham yanıt büyük olduğu için yalnızca DEBUG seviyesinde ve örneklenerek loglanır.
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Spotify arama yanıtı alındı.",
+            extra={"query": search_query, "playlist_count": len(playlists), "payload": response.text},
+        )
+
+    scored_playlists = []
+    for index, playlist in enumerate(playlists):
+        if not playlist:
+            continue
+
+
+        current_score = 0
+        owner = playlist.get("owner")
+        if owner and owner.get("display_name") == "Spotify":
+            current_score += 50
+        
+        if search_query.lower() in playlist.get("name", "").lower(): # mood yerine search_query kullan
+            current_score += 25
             
-            if not playlists:
-                print("Spotify'da hiç çalma listesi bulunamadı.")
-                return "https://open.spotify.com/"
-
-            scored_playlists = []
-            for index, playlist in enumerate(playlists):
-                if not playlist:
-                    continue
-                
-                # Playlist detaylarını logla
-                print(f"Playlist adı: {playlist.get('name')}, Sahibi: {playlist.get('owner', {}).get('display_name')}, URL: {playlist.get('external_urls', {}).get('spotify')}")
-
-                current_score = 0
-                owner = playlist.get("owner")
-                if owner and owner.get("display_name") == "Spotify":
-                    current_score += 50
-                
-                if search_query.lower() in playlist.get("name", "").lower(): # mood yerine search_query kullan
-                    current_score += 25
-                    
-                current_score += (limit - index)
-                
-                scored_playlists.append({"playlist": playlist, "score": current_score})
-
-            scored_playlists.sort(key=lambda x: x["score"], reverse=True)
-            top_candidates = scored_playlists[:5]
-
-            if not top_candidates:
-                 # En iyi adaylar boşsa, orijinal listelerden rastgele birini dene veya varsayılan dön
-                print("Puanlanmış en iyi adaylar bulunamadı, orijinal listelerden rastgele seçiliyor.")
-                if playlists:
-                    return random.choice(playlists).get("external_urls", {}).get("spotify")
-                return "https://open.spotify.com/"
-
-            chosen_one = random.choice(top_candidates)["playlist"]
-            print(f"Seçilen playlist: {chosen_one.get('name')}") # LOG: seçilen playlist
-            return chosen_one.get("external_urls", {}).get("spotify")
-
-        except httpx.TimeoutException:
-            print(f"Spotify'da çalma listesi aranırken zaman aşımı hatası oluştu.")
-            return "https://open.spotify.com/search/error"
-        except httpx.HTTPStatusError as e:
-            print(f"Spotify'da arama yapılırken hata: {e}")
-            return "https://open.spotify.com/search/error"
+        current_score += (limit - index)
+        
+        scored_playlists.append({"playlist": playlist, "score": current_score})
+
+    scored_playlists.sort(key=lambda x: x["score"], reverse=True)
+    return [
+        {
+            "name": item["playlist"].get("name"),
+            "url": item["playlist"].get("external_urls", {}).get("spotify"),
+        }
+        for item in scored_playlists[:5]
+    ]
+
+
+class PlaylistCandidateCache:
+    """
+    Arama terimi başına puanlanmış playlist adaylarını TTL ile önbellekte tutar.
+
+    `ttl` süresi içindeki kayıtlar doğrudan kullanılır. `ttl` ile
+    `ttl + stale_ttl` arasındaki kayıtlar yine anında döndürülür, ancak arka
+    planda yenilenir (stale-while-revalidate). Daha eski kayıtlar için istek
+    yenilemeyi bekler. Aynı terim için eşzamanlı yenilemeler birleştirilir.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: dict[str, tuple[list[dict], float]] = {}
+        self._refresh_tasks: dict[str, asyncio.Task] = {}
+
+    def _refresh(self, search_query: str, token: str) -> asyncio.Task:
+        task = self._refresh_tasks.get(search_query)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.create_task(self._fetch(search_query, token))
+            # Geri çağrı görev başına bir kez eklenir; başarısız yenileme bir kez loglanır.
+            task.add_done_callback(self._log_background_failure)
+            self._refresh_tasks[search_query] = task
+        return task
+
+    async def _fetch(self, search_query: str, token: str) -> list[dict]:
+        candidates = await _fetch_playlist_candidates(search_query, token)
+        self._entries[search_query] = (candidates, time.monotonic())
+        return candidates
+
+    def _log_background_failure(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Playlist önbelleği arka planda yenilenemedi: %s", task.exception())
+
+    async def get(self, search_query: str, token: str) -> list[dict]:
+        entry = self._entries.get(search_query)
+        if entry is not None:
+            candidates, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < self.ttl:
+                return candidates
+            if age < self.ttl + self.stale_ttl:
+                self._refresh(search_query, token)
+                return candidates
+        return await asyncio.shield(self._refresh(search_query, token))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+playlist_cache = PlaylistCandidateCache(
+    ttl=settings.SPOTIFY_PLAYLIST_CACHE_TTL,
+    stale_ttl=settings.SPOTIFY_PLAYLIST_CACHE_STALE_TTL,
+)
+
+
+async def search_spotify_playlist(search_query: str, token: str) -> str | None:
+    """
+    Verilen arama sorgusuna göre Spotify'da arama yapar, en alakalı çalma listelerini
+    puanlar ve en iyiler arasından rastgele birini seçer.
+
+    Puanlanmış adaylar arama terimi başına önbellekte tutulur; rastgele seçim
+    her istekte yeniden yapıldığı için kullanıcılar farklı listeler görmeye devam eder.
+    """
+    try:
+        top_candidates = await playlist_cache.get(search_query, token)
+    except SpotifyFetchError:
+        return "https://open.spotify.com/search/error"
+
+    if not top_candidates:
+        logger.info("Spotify'da hiç çalma listesi bulunamadı.", extra={"query": search_query})
+        return "https://open.spotify.com/"
+
+    chosen_one = random.choice(top_candidates)
+    logger.debug("Seçilen playlist: %s", chosen_one["name"])
+    return chosen_one["url"]
@@ -0,0 +1,177 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from .colormind_service import MOOD_TO_COLORMIND_MODEL
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+BundleBuilder = Callable[[str], Awaitable[dict | None]]
+
+# Yenilemeyi yapan sürecin kilidi bu süreden eskiyse (süreç çökmüş) devralınır.
+LOCK_STALE_SECONDS = 30 * 60
+# Kilit başka bir süreçteyse dosya bu aralıkla yeniden kontrol edilir.
+LOCK_RETRY_SECONDS = 60
+
+
+class SuggestionBundlePool:
+    """
+    Her duygu etiketi için önceden üretilmiş, eksiksiz öneri paketleri
+    (`color_palette`, `spotify_playlist`, `inspirational_quote`) havuzu.
+
+    Havuz yerel bir JSON dosyasında tutulur; dış servisler süre bütçesini
+    aştığında veya hızlı mod istendiğinde öneriler buradan anında verilir.
+    Paketler çevrimdışı olarak (`python -m backend.agents.build_suggestion_bundles`)
+    veya uygulama açıkken `refresh_seconds` aralıklarla arka planda yenilenir.
+    Arka plan yenilemesini kilit dosyasını alan tek süreç yapar; diğer
+    worker'lar yenilenen dosyayı diskten yükler.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        moods: list[str],
+        bundles_per_mood: int,
+        refresh_seconds: float,
+        initial_delay_seconds: float = 0.0,
+        build_concurrency: int | None = None,
+    ):
+        self.path = Path(path)
+        self.moods = moods
+        self.bundles_per_mood = bundles_per_mood
+        self.refresh_seconds = refresh_seconds
+        self.initial_delay_seconds = initial_delay_seconds
+        self.build_concurrency = build_concurrency
+        self.generated_at = 0.0
+        self._bundles: dict[str, list[dict]] = {}
+        self._loaded_mtime: float | None = None
+        self._lock_path = self.path.with_suffix(".lock")
+        self._refresh_task: asyncio.Task | None = None
+
+    def load(self) -> None:
+        """Havuzu diskten yükler; dosya yoksa, okunamıyorsa veya değişmediyse havuz olduğu gibi kalır."""
+        try:
+            mtime = self.path.stat().st_mtime
+            if mtime == self._loaded_mtime:
+                return
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Öneri paketleri okunamadı (%s): %s", self.path, e)
+            return
+        self._loaded_mtime = mtime
+        self._bundles = data.get("bundles", {})
+        self.generated_at = data.get("generated_at", 0.0)
+        logger.info("%d öneri paketi yüklendi.", sum(len(items) for items in self._bundles.values()))
+
+    def _save(self) -> None:
+        # Yarım yazılmış bir dosya okunmasın diye önce geçici dosyaya yazılır.
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(".tmp")
+        temp_path.write_text(
+            json.dumps({"generated_at": self.generated_at, "bundles": self._bundles}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        os.replace(temp_path, self.path)
+
+    def pick(self, mood_label: str) -> dict | None:
+        """Duygu için rastgele bir paketin kopyasını döndürür; havuz boşsa None."""
+        bundles = self._bundles.get(mood_label)
+        if not bundles:
+            return None
+        return dict(random.choice(bundles))
+
+    async def rebuild(self, builder: BundleBuilder, concurrency: int | None = None) -> None:
+        """
+        Her duygu için `bundles_per_mood` paket üretir ve havuzu diske yazar.
+        `concurrency` verilirse aynı anda en fazla o kadar paket üretilir.
+        Hiç paket üretilemeyen duygular için mevcut paketler korunur.
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.bundles_per_mood)
+
+        async def build(mood: str) -> dict | None:
+            async with semaphore:
+                return await builder(mood)
+
+        for mood in self.moods:
+            results = await asyncio.gather(
+                *(build(mood) for _ in range(self.bundles_per_mood)), return_exceptions=True
+            )
+            bundles = [bundle for bundle in results if isinstance(bundle, dict)]
+            if bundles:
+                self._bundles[mood] = bundles
+            else:
+                logger.warning("'%s' için öneri paketi üretilemedi, mevcut paketler korunuyor.", mood)
+        self.generated_at = time.time()
+        await asyncio.to_thread(self._save)
+        logger.info("Öneri paketleri yenilendi.", extra={"moods": {mood: len(items) for mood, items in self._bundles.items()}})
+
+    def _try_lock(self) -> bool:
+        """Yenileme kilidini almayı dener; kilit başka bir süreçteyse False."""
+        try:
+            if time.time() - self._lock_path.stat().st_mtime > LOCK_STALE_SECONDS:
+                self._lock_path.unlink(missing_ok=True)
+        except FileNotFoundError:
+            pass
+        self._lock_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            fd = os.open(self._lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w") as f:
+            f.write(str(os.getpid()))
+        return True
+
+    async def _refresh_periodically(self, builder: BundleBuilder) -> None:
+        # Açılışta dosya olmasa bile ilk üretim hemen başlamaz; canlı trafik ve
+        # Colormind rezervuarı önce ısınır.
+        await asyncio.sleep(self.initial_delay_seconds)
+        while True:
+            # Başka bir worker yenilemiş olabilir.
+            await asyncio.to_thread(self.load)
+            age = time.time() - self.generated_at
+            if age < self.refresh_seconds:
+                await asyncio.sleep(self.refresh_seconds - age)
+                continue
+            if not await asyncio.to_thread(self._try_lock):
+                await asyncio.sleep(LOCK_RETRY_SECONDS)
+                continue
+            failed = False
+            try:
+                await self.rebuild(builder, concurrency=self.build_concurrency)
+            except Exception as e:
+                logger.error("Öneri paketleri yenilenemedi: %s", e, exc_info=True)
+                failed = True
+            finally:
+                self._lock_path.unlink(missing_ok=True)
+            if failed:
+                await asyncio.sleep(min(self.refresh_seconds, 300))
+
+    def start(self, builder: BundleBuilder) -> None:
+        """Havuzu yükler ve (yenileme açıksa) arka planda periyodik yenilemeyi başlatır."""
+        self.load()
+        if self.refresh_seconds > 0:
+            self._refresh_task = asyncio.create_task(self._refresh_periodically(builder))
+
+    async def stop(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+
+
+suggestion_bundles = SuggestionBundlePool(
+    path=settings.SUGGESTION_BUNDLES_PATH,
+    moods=list(MOOD_TO_COLORMIND_MODEL),
+    bundles_per_mood=settings.SUGGESTION_BUNDLES_PER_MOOD,
+    refresh_seconds=settings.SUGGESTION_BUNDLES_REFRESH_SECONDS,
+    initial_delay_seconds=settings.SUGGESTION_BUNDLES_INITIAL_DELAY_SECONDS,
+    build_concurrency=settings.SUGGESTION_BUNDLES_BUILD_CONCURRENCY,
+)
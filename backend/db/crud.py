@@ -8,30 +8,33 @@ from typing import Optional
 from backend.db.models import User, MoodEntry, Suggestion
 from backend.schemas import UserCreate, MoodEntryCreate, SuggestionCreate, UserUpdate
 from backend.core.security import get_password_hash
+from backend.core.metrics import timed
 
-# Logger'ı yapılandır
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@timed("crud.get_user_by_email")
 async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
     """Verilen e-posta adresine sahip kullanıcıyı veritabanından bulur."""
     result = await db.execute(select(User).filter(User.email == email))
     return result.scalars().first()
 
 
+@timed("crud.get_user_by_username")
 async def get_user_by_username(db: AsyncSession, username: str) -> User | None:
     """Verilen kullanıcı adına sahip kullanıcıyı veritabanından bulur."""
     result = await db.execute(select(User).filter(User.username == username))
     return result.scalars().first()
 
 
+@timed("crud.get_user_by_id")
 async def get_user_by_id(db: AsyncSession, user_id: int) -> User | None:
     """Verilen ID'ye sahip kullanıcıyı veritabanından bulur."""
     result = await db.execute(select(User).filter(User.id == user_id))
     return result.scalars().first()
 
 
+@timed("crud.create_user")
 async def create_user(db: AsyncSession, user: UserCreate) -> User:
     """Yeni bir kullanıcı oluşturur ve veritabanına ekler."""
     hashed_password = get_password_hash(user.password)
@@ -44,6 +47,7 @@ async def create_user(db: AsyncSession, user: UserCreate) -> User:
     return db_user
 
 
+@timed("crud.update_user")
 async def update_user(db: AsyncSession, user_id: int, user_update: "UserUpdate") -> User | None:
     """Kullanıcının profil bilgilerini (kullanıcı adı, bio) günceller."""
     
@@ -63,6 +67,7 @@ async def update_user(db: AsyncSession, user_id: int, user_update: "UserUpdate")
     return db_user
 
 
+@timed("crud.update_user_profile_image_url")
 async def update_user_profile_image_url(db: AsyncSession, user_id: int, image_url: str) -> User | None:
     """Kullanıcının profil fotoğrafı URL'sini günceller."""
     
@@ -78,6 +83,7 @@ async def update_user_profile_image_url(db: AsyncSession, user_id: int, image_ur
     return db_user
 
 
+@timed("crud.create_mood_entry")
 async def create_mood_entry(
     db: AsyncSession, mood_entry: MoodEntryCreate, user_id: int, emoji: Optional[str] = None
 ) -> MoodEntry:
@@ -91,6 +97,46 @@ async def create_mood_entry(
     return db_mood_entry
 
 
+@timed("crud.create_mood_entry_with_suggestions")
+async def create_mood_entry_with_suggestions(
+    db: AsyncSession,
+    user_id: int,
+    text_input: str,
+    ai_results: dict,
+    emoji: Optional[str] = None,
+) -> MoodEntry:
+    """
+    AI analiz sonuçlarından bir duygu girdisi ve ona bağlı renk, müzik ve söz
+    önerilerini oluşturur. Commit işlemi çağıran tarafta yapılır.
+    """
+    db_mood_entry = await create_mood_entry(
+        db=db,
+        mood_entry=MoodEntryCreate(
+            text_input=text_input,
+            mood_label=ai_results.get("mood_label", "bilinmiyor"),
+        ),
+        user_id=user_id,
+        emoji=emoji,
+    )
+    db_mood_entry.suggestions.extend([
+        Suggestion(
+            suggestion_type="color",
+            content=",".join(ai_results.get("color_palette", [])),
+        ),
+        Suggestion(
+            suggestion_type="music",
+            content=ai_results.get("spotify_playlist"),
+        ),
+        Suggestion(
+            suggestion_type="quote",
+            content=ai_results.get("inspirational_quote"),
+        ),
+    ])
+    db.add(db_mood_entry)
+    return db_mood_entry
+
+
+@timed("crud.create_suggestion_for_mood_entry")
 async def create_suggestion_for_mood_entry(
     db: AsyncSession, suggestion: SuggestionCreate, mood_entry_id: int
 ) -> Suggestion:
@@ -103,6 +149,7 @@ async def create_suggestion_for_mood_entry(
     return db_suggestion
 
 
+@timed("crud.get_mood_entries_by_user")
 async def get_mood_entries_by_user(
     db: AsyncSession, user_id: int, skip: int = 0, limit: int = 10
 ) -> list[MoodEntry]:
@@ -118,6 +165,7 @@ async def get_mood_entries_by_user(
     return list(result.scalars().all())
 
 
+@timed("crud.count_mood_entries_by_user")
 async def count_mood_entries_by_user(db: AsyncSession, user_id: int) -> int:
     """Belirli bir kullanıcıya ait toplam duygu girdisi sayısını döndürür."""
     result = await db.execute(
@@ -127,6 +175,7 @@ async def count_mood_entries_by_user(db: AsyncSession, user_id: int) -> int:
     return count if count is not None else 0
 
 
+@timed("crud.get_mood_entry_by_id")
 async def get_mood_entry_by_id(db: AsyncSession, mood_entry_id: int) -> MoodEntry | None:
     """ID'ye göre tek bir duygu girdisi getirir."""
     result = await db.execute(
@@ -135,6 +184,7 @@ async def get_mood_entry_by_id(db: AsyncSession, mood_entry_id: int) -> MoodEntr
     return result.scalars().first()
 
 
+@timed("crud.delete_mood_entry_by_id")
 async def delete_mood_entry_by_id(db: AsyncSession, mood_entry: MoodEntry) -> None:
     """Verilen bir duygu girdisini ve ilişkili önerilerini siler."""
     # İlişkili önerileri sil (cascade delete olsaydı buna gerek kalmazdı)
@@ -144,6 +194,7 @@ async def delete_mood_entry_by_id(db: AsyncSession, mood_entry: MoodEntry) -> No
     await db.delete(mood_entry)
 
 
+@timed("crud.add_reasoning_to_mood_entry")
 async def add_reasoning_to_mood_entry(
     db: AsyncSession, mood_entry: MoodEntry, reasoning_text: str
 ) -> MoodEntry:
@@ -153,6 +204,7 @@ async def add_reasoning_to_mood_entry(
     return mood_entry
 
 
+@timed("crud.get_mood_entry_with_suggestions")
 async def get_mood_entry_with_suggestions(
     db: AsyncSession, mood_entry_id: int
 ) -> MoodEntry | None:
@@ -10,12 +10,12 @@ from backend.core.config import settings
 
 DATABASE_URL = settings.DATABASE_URL
 
-# Veritabanı motorunu oluştur. `echo=True` geliştirme aşamasında
-# çalıştırılan SQL sorgularını konsola basar, bu da hata ayıklama için kullanışlıdır.
+# Veritabanı motorunu oluştur. SQL sorgularını görmek için `echo=True` yerine
+# DB_ECHO ayarı kullanılır; böylece sorgular senkron stdout yerine kuyruk
+# tabanlı log hattından geçer (bkz. core/logging_config.py).
 # connect_args={"check_same_thread": False} sadece SQLite için gereklidir.
 engine = create_async_engine(
     DATABASE_URL, 
-    echo=True, 
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
 )
 
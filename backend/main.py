@@ -1,21 +1,61 @@
+import asyncio
+import logging
 import os
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from backend.db.database import Base, engine
 from backend.api import auth
+from backend.core.config import settings
+from backend.core.http_clients import http_client_pools
+from backend.core.colormind_service import palette_reservoir
+from backend.core.mood_classifier import classification_stats
+from backend.core.analysis_jobs import analysis_job_queue
+from backend.core.ai_service import build_suggestion_bundle
+from backend.core.suggestion_bundles import suggestion_bundles
+from backend.core.circuit_breaker import breaker_stats
+from backend.core.metrics import render_metrics
+from backend.core.logging_config import setup_logging
+from rag import embedding, retrieve
+
+# Loglar olay döngüsünü bloklamadan ayrı bir thread üzerinden yazılır.
+setup_logging()
+logger = logging.getLogger(__name__)
 
 # Static dosyalar için dizin oluştur
 os.makedirs("static/profile_images", exist_ok=True)
 
+
+async def _warm_up_rag() -> None:
+    # Embedding modeli ve Chroma koleksiyonu ayrı bir thread'de yüklenir; bu
+    # sürede sunucu açılır ve /health/ready hazır olana kadar 503 döner.
+    try:
+        await asyncio.to_thread(retrieve.warm_up)
+        logger.info("Embedding modeli ve RAG koleksiyonu hazır.")
+    except Exception as e:
+        logger.error("RAG ısınması başarısız oldu: %s", e, exc_info=True)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Uygulama başlangıcında
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
-    print("Veritabanı tabloları kontrol edildi ve oluşturuldu.")
-    yield
+    logger.info("Veritabanı tabloları kontrol edildi ve oluşturuldu.")
+    # Dış servisler için paylaşılan bağlantı havuzları uygulama boyunca açık kalır.
+    async with http_client_pools():
+        # Colormind paletlerini istekler gelmeden önce arka planda doldur.
+        if settings.PALETTE_SOURCE == "colormind":
+            palette_reservoir.start()
+        await analysis_job_queue.start(auth.run_analysis_job)
+        # Bozulmuş mod için önceden üretilmiş öneri paketlerini yükle ve yenile.
+        suggestion_bundles.start(build_suggestion_bundle)
+        warm_up_task = asyncio.create_task(_warm_up_rag())
+        yield
+        warm_up_task.cancel()
+        await suggestion_bundles.stop()
+        await analysis_job_queue.stop()
+        await palette_reservoir.stop()
     # Uygulama kapandığında burası çalışır (gerekirse)
 
 app = FastAPI(
@@ -52,3 +92,27 @@ app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 @app.get("/")
 def read_root():
     return {"message": "Welcome to MoodMuse API"}
+
+@app.get("/health/ready")
+def read_readiness(response: Response):
+    """Embedding modeli yüklendiyse 200, yüklenmediyse 503 döner."""
+    ready = embedding.is_ready()
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"ready": ready}
+
+@app.get("/stats/mood-classifier")
+def read_mood_classifier_stats():
+    """Duygu sınıflandırma katmanlarının ve etiket önbelleğinin isabet istatistikleri."""
+    return classification_stats()
+
+@app.get("/stats/circuit-breakers")
+def read_circuit_breaker_stats():
+    """Dış servis devre kesicilerinin anlık durumları."""
+    return breaker_stats()
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """Aşama gecikmeleri, hata sayaçları ve servis istatistikleri (Prometheus metin biçimi)."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
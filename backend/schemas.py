@@ -98,6 +98,20 @@ class AnalysisResponse(BaseModel):
     color_palette: list[str]
     spotify_playlist: str
     inspirational_quote: str
+    # Süre bütçesini aşıp varsayılan değere düşen aşamalar (örn. "color_palette")
+    degraded_stages: list[str] = []
+
+
+class AnalysisJobCreated(BaseModel):
+    job_id: str
+    status: str
+
+
+class AnalysisJobStatus(BaseModel):
+    job_id: str
+    status: str  # queued, running, completed, failed
+    result: Optional[AnalysisResponse] = None
+    detail: Optional[str] = None
 
 
 # ==============================================================================
@@ -0,0 +1,342 @@
+"""
+/api/v1/auth/analyze uç noktası için tekrarlanabilir yük testi.
+
+Dış servislerin yerel taklitlerini (bkz. fake_upstreams.py) ve backend'i ayrı
+süreçlerde başlatır, backend'i ortam değişkenleriyle taklitlere yönlendirir,
+analiz uç noktasını sabit eşzamanlılık seviyelerinde çalıştırır ve her seviye
+için verim (istek/sn) ile uçtan uca ve aşama başına p50/p95/p99 gecikmeleri
+raporlar. Aşama gecikmeleri, backend'in /metrics çıktısındaki histogramların
+seviye öncesi ve sonrası farkından hesaplanır.
+
+Sonuçlar zaman damgası ve git commit'iyle birlikte benchmarks/results/
+altına JSON olarak kaydedilir; iki çalıştırma `--compare` ile karşılaştırılabilir.
+
+    python -m benchmarks.analyze_bench --concurrency 1,4,16 --requests 100
+    python -m benchmarks.analyze_bench --compare results/a.json results/b.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+STAGE_HISTOGRAM = "moodmuse_stage_latency_seconds"
+PERCENTILES = (50, 95, 99)
+
+SAMPLE_TEXTS = [
+    "Bugün işte her şey ters gitti, çok yoruldum",
+    "Sınavı geçtim, inanılmaz mutluyum!",
+    "Yağmurlu bir pazar, kitap okuyup çay içiyorum",
+    "Ne yapacağımı bilmiyorum, iki iş teklifi arasında kaldım",
+    "Sabah koşusundan sonra enerjim tavan",
+    "Eski fotoğraflara bakıp geçmişi düşündüm",
+]
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """Sıralı olmayan bir listeden en yakın sıra yöntemiyle yüzdelik değeri döndürür."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def histogram_percentile(buckets: list[tuple[float, float]], pct: float) -> float | None:
+    """
+    Kümülatif (üst sınır, sayı) kovalarından Prometheus'un histogram_quantile
+    yöntemiyle, kova içinde doğrusal ara değerleme yaparak yüzdelik hesaplar.
+    """
+    if not buckets or buckets[-1][1] <= 0:
+        return None
+    total = buckets[-1][1]
+    target = pct / 100 * total
+    lower_bound, lower_count = 0.0, 0.0
+    for upper_bound, count in buckets:
+        if count >= target:
+            if math.isinf(upper_bound):
+                return lower_bound
+            if count == lower_count:
+                return upper_bound
+            return lower_bound + (upper_bound - lower_bound) * (target - lower_count) / (count - lower_count)
+        lower_bound, lower_count = upper_bound, count
+    return lower_bound
+
+
+def parse_stage_buckets(metrics_text: str) -> dict[str, dict[float, float]]:
+    """/metrics çıktısından aşama başına kümülatif kova sayılarını çıkarır."""
+    stages: dict[str, dict[float, float]] = {}
+    for family in text_string_to_metric_families(metrics_text):
+        if family.name != STAGE_HISTOGRAM:
+            continue
+        for sample in family.samples:
+            if sample.name != f"{STAGE_HISTOGRAM}_bucket":
+                continue
+            stage = sample.labels["stage"]
+            stages.setdefault(stage, {})[float(sample.labels["le"])] = sample.value
+    return stages
+
+
+def stage_percentiles(before: dict, after: dict) -> dict:
+    """İki /metrics anlık görüntüsü arasındaki farktan aşama yüzdeliklerini hesaplar."""
+    report = {}
+    for stage, after_buckets in sorted(after.items()):
+        before_buckets = before.get(stage, {})
+        buckets = [
+            (bound, count - before_buckets.get(bound, 0.0))
+            for bound, count in sorted(after_buckets.items())
+        ]
+        observed = buckets[-1][1] if buckets else 0
+        if observed <= 0:
+            continue
+        report[stage] = {"count": int(observed)}
+        for pct in PERCENTILES:
+            value = histogram_percentile(buckets, pct)
+            report[stage][f"p{pct}_ms"] = round(value * 1000, 2) if value is not None else None
+    return report
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _wait_until_ready(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"{url} {timeout:.0f} sn içinde hazır olmadı.")
+
+
+def start_fake_upstreams(args) -> subprocess.Popen:
+    command = [sys.executable, "-m", "benchmarks.fake_upstreams", "--port", str(args.fake_port)]
+    if args.profile:
+        command += ["--profile", args.profile]
+    if args.replay_dir:
+        command += ["--replay-dir", args.replay_dir]
+    if args.seed is not None:
+        command += ["--seed", str(args.seed)]
+    process = subprocess.Popen(command, cwd=REPO_ROOT)
+    _wait_until_ready(f"http://127.0.0.1:{args.fake_port}/docs")
+    return process
+
+
+def start_backend(args, database_path: Path) -> subprocess.Popen:
+    fake_url = f"http://127.0.0.1:{args.fake_port}"
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{database_path}",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark-secret"),
+        "GEMINI_API_KEY": "fake",
+        "GEMINI_API_ENDPOINT": fake_url,
+        "COLORMIND_API_URL": fake_url,
+        "SPOTIFY_ACCOUNTS_URL": fake_url,
+        "SPOTIFY_API_URL": fake_url,
+        "SPOTIFY_CLIENT_ID": "fake",
+        "SPOTIFY_CLIENT_SECRET": "fake",
+        "AI_SERVICE_URL": fake_url,
+        # Taklitler HTTP/1.1 konuşur; kalıcı etiket önbelleği de ölçümü bozmasın.
+        "HTTP2_ENABLED": "false",
+        "MOOD_CACHE_SQLITE_PATH": "",
+    }
+    command = [
+        sys.executable, "-m", "uvicorn", "backend.main:app",
+        "--port", str(args.backend_port), "--log-level", "warning",
+    ]
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env=env)
+    # Embedding modeli yüklenene kadar /health/ready 503 döner.
+    _wait_until_ready(f"http://127.0.0.1:{args.backend_port}/health/ready", timeout=180.0)
+    return process
+
+
+async def login(client: httpx.AsyncClient) -> str:
+    username = f"bench_{uuid.uuid4().hex[:8]}"
+    password = "benchmark-password"
+    response = await client.post(
+        "/api/v1/auth/register",
+        json={"username": username, "email": f"{username}@example.com", "password": password},
+    )
+    response.raise_for_status()
+    response = await client.post("/api/v1/auth/login", data={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run_level(client: httpx.AsyncClient, token: str, concurrency: int, total: int) -> dict:
+    """`total` isteği en fazla `concurrency` eşzamanlı istekle gönderir."""
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies: list[float] = []
+    errors = 0
+    degraded = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors, degraded
+        for index in counter:
+            # Her metin benzersiz olsun ki duygu etiketi önbelleği ölçümü kısaltmasın.
+            text = f"{SAMPLE_TEXTS[index % len(SAMPLE_TEXTS)]} ({uuid.uuid4().hex[:6]})"
+            started_at = time.perf_counter()
+            try:
+                response = await client.post("/api/v1/auth/analyze", json={"text_input": text}, headers=headers)
+                response.raise_for_status()
+                if response.json().get("degraded_stages"):
+                    degraded += 1
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started_at
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "degraded": degraded,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(latencies) / duration, 2) if duration else 0.0,
+        "latency_ms": {
+            f"p{pct}": round(value * 1000, 2) if (value := percentile(latencies, pct)) is not None else None
+            for pct in PERCENTILES
+        },
+    }
+
+
+async def run_benchmark(args) -> dict:
+    levels = []
+    async with httpx.AsyncClient(base_url=args.backend_url, timeout=args.request_timeout) as client:
+        token = await login(client)
+        if args.warmup:
+            await run_level(client, token, 1, args.warmup)
+        for concurrency in args.concurrency:
+            before = parse_stage_buckets((await client.get("/metrics")).text)
+            level = await run_level(client, token, concurrency, args.requests)
+            after = parse_stage_buckets((await client.get("/metrics")).text)
+            level["stages"] = stage_percentiles(before, after)
+            levels.append(level)
+            print(
+                f"eşzamanlılık={concurrency:>3}  verim={level['throughput_rps']:>7.2f} istek/sn  "
+                f"p50={level['latency_ms']['p50']} ms  p95={level['latency_ms']['p95']} ms  "
+                f"p99={level['latency_ms']['p99']} ms  hata={level['errors']}"
+            )
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "label": args.label,
+        "profile": json.loads(Path(args.profile).read_text(encoding="utf-8")) if args.profile else None,
+        "replay_dir": args.replay_dir,
+        "requests_per_level": args.requests,
+        "levels": levels,
+    }
+
+
+def save_result(result: dict, output: str | None) -> Path:
+    if output:
+        path = Path(output)
+    else:
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        commit = (result["git_commit"] or "nogit")[:8]
+        path = RESULTS_DIR / f"{stamp}-{commit}{'-' + result['label'] if result['label'] else ''}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def _change(old, new) -> str:
+    if old is None or new is None:
+        return "-"
+    if old == 0:
+        return f"{new}"
+    return f"{new} ({(new - old) / old * 100:+.1f}%)"
+
+
+def compare(baseline_path: str, candidate_path: str) -> None:
+    """İki sonuç dosyasını eşzamanlılık seviyesi bazında karşılaştırır."""
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    candidate = json.loads(Path(candidate_path).read_text(encoding="utf-8"))
+    print(f"Temel:  {baseline_path} ({(baseline.get('git_commit') or '')[:8]})")
+    print(f"Aday:   {candidate_path} ({(candidate.get('git_commit') or '')[:8]})")
+
+    baseline_levels = {level["concurrency"]: level for level in baseline["levels"]}
+    for level in candidate["levels"]:
+        old = baseline_levels.get(level["concurrency"])
+        if old is None:
+            continue
+        print(f"\neşzamanlılık={level['concurrency']}")
+        print(f"  verim (istek/sn): {old['throughput_rps']} -> {_change(old['throughput_rps'], level['throughput_rps'])}")
+        for pct in PERCENTILES:
+            key = f"p{pct}"
+            print(f"  uçtan uca {key} (ms): {old['latency_ms'][key]} -> {_change(old['latency_ms'][key], level['latency_ms'][key])}")
+        for stage, stats in level["stages"].items():
+            old_stats = old["stages"].get(stage, {})
+            print(f"  {stage} p95 (ms): {old_stats.get('p95_ms')} -> {_change(old_stats.get('p95_ms'), stats['p95_ms'])}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="/analyze uç noktası için yük testi.")
+    parser.add_argument("--concurrency", default="1,4,16",
+                        type=lambda value: [int(part) for part in value.split(",")],
+                        help="Virgülle ayrılmış eşzamanlılık seviyeleri")
+    parser.add_argument("--requests", type=int, default=100, help="Her seviyede gönderilecek istek sayısı")
+    parser.add_argument("--warmup", type=int, default=5, help="Ölçüm öncesi ısınma isteği sayısı")
+    parser.add_argument("--request-timeout", type=float, default=60.0)
+    parser.add_argument("--profile", help="Taklit servislerin gecikme/hata profili (JSON)")
+    parser.add_argument("--replay-dir", help="Taklit servislerin yeniden oynatacağı kayıtlı yanıtlar")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--fake-port", type=int, default=9100)
+    parser.add_argument("--backend-port", type=int, default=8100)
+    parser.add_argument("--backend-url",
+                        help="Zaten çalışan bir backend'i ölç; verilirse süreçler başlatılmaz")
+    parser.add_argument("--label", default="", help="Sonuç dosyasına eklenecek kısa etiket")
+    parser.add_argument("--output", help="Sonuç dosyasının yolu (varsayılan: benchmarks/results/)")
+    parser.add_argument("--compare", nargs=2, metavar=("TEMEL", "ADAY"), help="İki sonuç dosyasını karşılaştır")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    processes: list[subprocess.Popen] = []
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            if not args.backend_url:
+                processes.append(start_fake_upstreams(args))
+                processes.append(start_backend(args, Path(workdir) / "bench.db"))
+                args.backend_url = f"http://127.0.0.1:{args.backend_port}"
+            result = asyncio.run(run_benchmark(args))
+        finally:
+            for process in reversed(processes):
+                process.terminate()
+                process.wait(timeout=10)
+
+    print(f"Sonuçlar kaydedildi: {save_result(result, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+MoodMuse'un bağlandığı dış servislerin (Colormind, Spotify, Gemini ve
+text-generation-webui) yerel taklitleri.
+
+Her servis için gecikme dağılımı ve hata oranı bir profil dosyasından
+ayarlanabilir; kayıtlı yanıtlar verilirse sırayla yeniden oynatılır.
+Tek başına çalıştırmak için:
+
+    python -m benchmarks.fake_upstreams --port 9100 --profile benchmarks/profiles/default.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+from pathlib import Path
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+UPSTREAMS = ("colormind", "spotify_accounts", "spotify_api", "gemini", "llm")
+
+DEFAULT_PROFILE = {
+    "colormind": {"latency": {"dist": "lognormal", "median_ms": 250, "sigma": 0.5}, "error_rate": 0.0},
+    "spotify_accounts": {"latency": {"dist": "lognormal", "median_ms": 120, "sigma": 0.3}, "error_rate": 0.0},
+    "spotify_api": {"latency": {"dist": "lognormal", "median_ms": 180, "sigma": 0.4}, "error_rate": 0.0},
+    "gemini": {"latency": {"dist": "lognormal", "median_ms": 900, "sigma": 0.4}, "error_rate": 0.0},
+    "llm": {"latency": {"dist": "lognormal", "median_ms": 600, "sigma": 0.3}, "error_rate": 0.0},
+}
+
+MOODS = ["mutlu", "üzgün", "kızgın", "şaşkın", "sakin", "enerjik", "düşünceli", "kararsız"]
+
+
+def sample_latency(spec: dict, rng: random.Random) -> float:
+    """Profildeki dağılıma göre saniye cinsinden bir gecikme örnekler."""
+    dist = spec.get("dist", "fixed")
+    if dist == "fixed":
+        ms = spec.get("ms", 0)
+    elif dist == "uniform":
+        ms = rng.uniform(spec["min_ms"], spec["max_ms"])
+    elif dist == "normal":
+        ms = max(0.0, rng.gauss(spec["mean_ms"], spec["stddev_ms"]))
+    elif dist == "lognormal":
+        ms = rng.lognormvariate(math.log(spec["median_ms"]), spec.get("sigma", 0.5))
+    else:
+        raise ValueError(f"Bilinmeyen gecikme dağılımı: {dist}")
+    return ms / 1000
+
+
+def _colormind_response(rng: random.Random) -> dict:
+    return {"result": [[rng.randrange(256) for _ in range(3)] for _ in range(5)]}
+
+
+def _spotify_token_response(rng: random.Random) -> dict:
+    return {"access_token": f"fake-{rng.getrandbits(32):08x}", "token_type": "Bearer", "expires_in": 3600}
+
+
+def _spotify_search_response(query: str, rng: random.Random) -> dict:
+    items = [
+        {
+            "name": f"{query} #{index}",
+            "owner": {"display_name": "Spotify" if index % 4 == 0 else f"user{index}"},
+            "external_urls": {"spotify": f"https://open.spotify.com/playlist/fake{index:04d}"},
+        }
+        for index in range(20)
+    ]
+    return {"playlists": {"items": items}}
+
+
+def _gemini_response(rng: random.Random) -> dict:
+    return {
+        "candidates": [
+            {
+                "content": {"parts": [{"text": "Bir nefes al; bu an da geçecek ve sen buradasın."}], "role": "model"},
+                "finishReason": "STOP",
+                "index": 0,
+            }
+        ]
+    }
+
+
+def _llm_response(prompt: str, rng: random.Random) -> dict:
+    # Toplu sınıflandırma prompt'larına numaralı satırlarla yanıt ver.
+    count = prompt.count("Metin:")
+    if count > 1:
+        content = "\n".join(f"{index}: {rng.choice(MOODS)}" for index in range(1, count + 1))
+    else:
+        content = rng.choice(MOODS)
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "local-model",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def load_replays(replay_dir: str | None) -> dict:
+    """`<servis>.json` dosyalarındaki kayıtlı yanıt listelerini döngüsel yineleyicilere çevirir."""
+    replays = {}
+    if not replay_dir:
+        return replays
+    for upstream in UPSTREAMS:
+        path = Path(replay_dir) / f"{upstream}.json"
+        if path.exists():
+            responses = json.loads(path.read_text(encoding="utf-8"))
+            replays[upstream] = itertools.cycle(responses)
+    return replays
+
+
+def create_app(profile: dict | None = None, replay_dir: str | None = None, seed: int | None = None) -> FastAPI:
+    profile = {**DEFAULT_PROFILE, **(profile or {})}
+    replays = load_replays(replay_dir)
+    rng = random.Random(seed)
+    app = FastAPI(title="MoodMuse fake upstreams")
+
+    async def respond(upstream: str, build):
+        spec = profile[upstream]
+        await asyncio.sleep(sample_latency(spec.get("latency", {}), rng))
+        if rng.random() < spec.get("error_rate", 0.0):
+            return JSONResponse({"error": "injected failure"}, status_code=spec.get("error_status", 503))
+        if upstream in replays:
+            return JSONResponse(next(replays[upstream]))
+        return JSONResponse(build())
+
+    @app.post("/api/")
+    async def colormind():
+        return await respond("colormind", lambda: _colormind_response(rng))
+
+    @app.post("/api/token")
+    async def spotify_token():
+        return await respond("spotify_accounts", lambda: _spotify_token_response(rng))
+
+    @app.get("/v1/search")
+    async def spotify_search(q: str = ""):
+        return await respond("spotify_api", lambda: _spotify_search_response(q, rng))
+
+    @app.post("/v1beta/models/{model_action:path}")
+    async def gemini(model_action: str):
+        return await respond("gemini", lambda: _gemini_response(rng))
+
+    @app.post("/v1/chat/completions")
+    async def llm(request: Request):
+        body = await request.json()
+        prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        return await respond("llm", lambda: _llm_response(prompt, rng))
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MoodMuse dış servis taklitlerini çalıştırır.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--profile", help="Gecikme ve hata oranı profili (JSON)")
+    parser.add_argument("--replay-dir", help="Kayıtlı yanıtların bulunduğu klasör")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    profile = json.loads(Path(args.profile).read_text(encoding="utf-8")) if args.profile else None
+    uvicorn.run(create_app(profile, args.replay_dir, args.seed), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Süreç genelinde paylaşılan, ilk kullanımda yüklenen embedding modeli.
+
+ingest.py, retrieve.py ve backend'deki duygu sınıflandırıcısı aynı model
+örneğini kullanır; model modül içe aktarılırken değil, ilk `encode` veya
+`warm_up` çağrısında yüklenir.
+
+Çıkarım arka ucu `RAG_EMBEDDER` ortam değişkeniyle seçilir (yalnızca CPU):
+  - "torch" (varsayılan): tam hassasiyetli PyTorch modeli.
+  - "int8": Linear katmanları dinamik int8 kuantize edilmiş PyTorch modeli.
+  - "onnx": sentence-transformers'ın ONNX Runtime arka ucu; isteğe bağlı
+    bağımlılık backend/requirements-onnx.txt ile kurulur.
+"""
+import os
+import threading
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDERS = ("torch", "int8", "onnx")
+
+_model = None
+_lock = threading.Lock()
+
+
+def embedder_name() -> str:
+    name = os.getenv("RAG_EMBEDDER", "torch").lower()
+    if name not in EMBEDDERS:
+        raise ValueError(f"Bilinmeyen RAG_EMBEDDER: {name!r} ({', '.join(EMBEDDERS)} olmalı)")
+    return name
+
+
+def model_id(embedder=None) -> str:
+    """Embedding önbelleği anahtarında kullanılan model kimliği; arka uçlar birbirinin vektörünü kullanmaz."""
+    embedder = embedder or embedder_name()
+    return MODEL_NAME if embedder == "torch" else f"{MODEL_NAME}#{embedder}"
+
+
+def load_model(embedder):
+    from sentence_transformers import SentenceTransformer
+    if embedder == "onnx":
+        return SentenceTransformer(MODEL_NAME, device="cpu", backend="onnx")
+    model = SentenceTransformer(MODEL_NAME, device="cpu")
+    if embedder == "int8":
+        import torch
+        # Ağırlıklar int8 saklanır, aktivasyonlar çıkarım sırasında kuantize edilir.
+        torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+def get_model():
+    global _model
+    if _model is None:
+        # Aynı anda gelen ilk çağrılar modeli iki kez yüklemesin.
+        with _lock:
+            if _model is None:
+                _model = load_model(embedder_name())
+    return _model
+
+
+def encode(texts, **kwargs):
+    """SentenceTransformer.encode ile aynı imza; model gerekirse burada yüklenir."""
+    return get_model().encode(texts, **kwargs)
+
+
+def warm_up():
+    """Modeli yükler ve ilk çıkarım maliyetini istek gelmeden öder."""
+    encode(["ısınma"])
+
+
+def is_ready() -> bool:
+    return _model is not None
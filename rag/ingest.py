@@ -1,37 +1,279 @@
-from chromadb import Client
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
-import uuid, glob, os
+import glob, hashlib, itertools, json, os, sqlite3, time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 from pypdf import PdfReader
 
-EMBED = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-DB = Client(Settings(persist_directory="rag/chroma", anonymized_telemetry=False))
-COLL = DB.get_or_create_collection("moodmuse_rag")
+from rag import embedding
+from rag.store import CHROMA_PATH, bump_generation, get_backend
+
+# Encode bu kadar parça birikince toplu yapılır; Chroma'ya da tek seferde en
+# fazla ADD_BATCH_SIZE parça yazılır.
+ENCODE_BATCH_SIZE = 256
+ADD_BATCH_SIZE = 1000
+# PDF'ler süreç havuzunda bu kadar sayfalık parçalar halinde okunur; metin
+# dosyaları bu boyutta bloklarla okunur.
+PAGES_PER_TASK = 8
+TEXT_BLOCK_SIZE = 1 << 16
+
+# Hangi dosyanın hangi içerik özetiyle ve kaç parça olarak eklendiğini tutar;
+# yeniden çalıştırmada yalnızca yeni/değişmiş dosyalar işlenir. Her vektör
+# deposunun kendi dizininde ayrı bir manifest bulunur.
+MANIFEST_NAME = "manifest.json"
+# Parça metni ve model adına göre anahtarlanmış embedding önbelleği.
+EMBEDDING_CACHE_PATH = os.path.join(CHROMA_PATH, "embedding_cache.sqlite")
+
+def iter_chunks(segments, size=500, overlap=120):
+    """
+    Art arda eklenmesi belge metnini veren parçalardan (sayfalar, bloklar)
+    `size` uzunluğunda, `overlap` kadar örtüşen parçaları sayfa sınırlarından
+    bağımsız olarak üretir. Bellekte en fazla bir parça + bir segment tutulur.
+    """
+    step = size - overlap
+    buf = ""
+    for segment in segments:
+        buf += segment
+        while len(buf) >= size:
+            yield buf[:size]
+            buf = buf[step:]
+    # Kalan kısım: tam metin üzerinde i < len(txt) olduğu sürece üretilen son parçalar.
+    while buf:
+        yield buf
+        if len(buf) <= step:
+            break
+        buf = buf[step:]
 
 def chunk(txt, size=500, overlap=120):
-    out=[]; i=0
-    while i < len(txt):
-        out.append(txt[i:i+size]); i += (size-overlap)
-    return out
+    return list(iter_chunks([txt], size, overlap))
 
-def extract_text(fp):
+def iter_pages(fp):
+    """Belge metnini sayfa sayfa (metin dosyalarında blok blok) ve tembel olarak üretir."""
     if fp.lower().endswith(".pdf"):
-        r = PdfReader(fp); return " ".join([p.extract_text() or "" for p in r.pages])
+        for i, p in enumerate(PdfReader(fp).pages):
+            # Sayfalar tek boşlukla birleştirilir.
+            yield (" " if i else "") + (p.extract_text() or "")
+        return
     # md/txt varsa burada genişlet
-    with open(fp, "r", encoding="utf-8", errors="ignore") as f: return f.read()
+    with open(fp, "r", encoding="utf-8", errors="ignore") as f:
+        yield from iter(lambda: f.read(TEXT_BLOCK_SIZE), "")
+
+def extract_text(fp):
+    return "".join(iter_pages(fp))
+
+def file_hash(fp):
+    h = hashlib.sha256()
+    with open(fp, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def doc_key(rel_path, content_hash):
+    # Aynı içerikli iki dosyanın parçaları birbirinin kimliğini ezmesin diye
+    # dosya yolu da anahtara katılır.
+    return hashlib.sha256(f"{rel_path}\0{content_hash}".encode("utf-8")).hexdigest()
+
+def chunk_ids(key, count):
+    """Parça kimlikleri belge anahtarından türetilir; aynı belge aynı kimlikleri alır."""
+    return [f"{key[:32]}-{i}" for i in range(count)]
+
+
+class EmbeddingCache:
+    """Parça embedding'lerini (model adı + parça özeti) anahtarıyla SQLite'ta saklar."""
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH, model_name=None):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.model_name = model_name or embedding.model_id()
+        self.hits = 0
+        self._db = sqlite3.connect(path)
+        self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+
+    def _key(self, text):
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def encode(self, texts):
+        """Önbellekte olmayan parçaları tek bir toplu encode ile hesaplar."""
+        keys = [self._key(t) for t in texts]
+        found = {}
+        for i in range(0, len(keys), 500):
+            part = keys[i:i+500]
+            rows = self._db.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part)
+            found.update({k: np.frombuffer(v, dtype=np.float32) for k, v in rows})
+        self.hits += sum(k in found for k in keys)
+
+        missing = [i for i, k in enumerate(keys) if k not in found]
+        if missing:
+            vectors = np.asarray(embedding.encode([texts[i] for i in missing], batch_size=64), dtype=np.float32)
+            self._db.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?)",
+                                 [(keys[i], v.tobytes()) for i, v in zip(missing, vectors)])
+            self._db.commit()
+            found.update({keys[i]: v for i, v in zip(missing, vectors)})
+        return [found[k].tolist() for k in keys]
+
+    def close(self):
+        self._db.close()
+
+
+def _write_batch(coll, cache, ids, chunks, metas):
+    """Parçaları (önbellek üzerinden) toplu encode eder ve toplu olarak ekler."""
+    vectors = cache.encode(chunks)
+    for i in range(0, len(chunks), ADD_BATCH_SIZE):
+        coll.upsert(ids=ids[i:i+ADD_BATCH_SIZE],
+                    documents=chunks[i:i+ADD_BATCH_SIZE],
+                    metadatas=metas[i:i+ADD_BATCH_SIZE],
+                    embeddings=vectors[i:i+ADD_BATCH_SIZE])
+
+def add_docs(docs, cache=None):
+    """
+    (belge anahtarı, parça yineleyicisi, metadata) üçlülerindeki parçaları
+    ENCODE_BATCH_SIZE'lık gruplar halinde encode edip koleksiyona ekler; bellekte
+    en fazla bir grup tutulur. Belge anahtarı başına parça sayısını döndürür.
+    """
+    coll = get_backend()
+    own_cache = cache is None
+    cache = cache or EmbeddingCache()
+    ids, chunks, metas, counts = [], [], [], {}
+    try:
+        for key, doc_chunks, meta in docs:
+            counts[key] = 0
+            for c in doc_chunks:
+                ids.append(f"{key[:32]}-{counts[key]}"); chunks.append(c); metas.append(meta)
+                counts[key] += 1
+                if len(chunks) >= ENCODE_BATCH_SIZE:
+                    _write_batch(coll, cache, ids, chunks, metas)
+                    ids, chunks, metas = [], [], []
+        if chunks:
+            _write_batch(coll, cache, ids, chunks, metas)
+    finally:
+        if own_cache:
+            cache.close()
+    coll.persist()
+    if any(counts.values()):
+        # Koleksiyon değişti; retrieve.py'deki önbellekli sonuçlar geçersiz olsun.
+        bump_generation()
+    return counts
 
 def add_doc(text, meta):
-    for c in chunk(text):
-        COLL.add(ids=[str(uuid.uuid4())],
-                 documents=[c],
-                 metadatas=[meta],
-                 embeddings=[EMBED.encode(c).tolist()])
+    key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return add_docs([(key, iter_chunks([text]), meta)])[key]
+
+def _load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f: return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def _save_manifest(manifest, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f: json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+def _extract_pages(fp, start, end):
+    pages = PdfReader(fp).pages
+    return "".join((" " if i else "") + (pages[i].extract_text() or "") for i in range(start, end))
+
+def _page_tasks(files):
+    for fp in files:
+        if not fp.lower().endswith(".pdf"):
+            yield fp, None
+            continue
+        n = len(PdfReader(fp).pages)
+        for start in range(0, n, PAGES_PER_TASK):
+            yield fp, (start, min(start + PAGES_PER_TASK, n))
+        if n == 0:
+            yield fp, (0, 0)
+
+def _iter_segments(pool, files, window):
+    """
+    (dosya, metin segmenti) çiftlerini belge ve sayfa sırasıyla üretir. PDF
+    sayfaları süreç havuzunda okunur; aynı anda en fazla `window` görev
+    bekletildiği için bellekte tutulan metin belge boyutundan bağımsızdır.
+    """
+    inflight = deque()
+
+    def drain():
+        fp, future = inflight.popleft()
+        if future is None:
+            # Metin dosyaları ucuz olduğu için burada blok blok okunur; boş dosya da
+            # manifest'e girsin diye en az bir segment üretilir.
+            yield from ((fp, block) for block in itertools.chain(iter_pages(fp), [""]))
+        else:
+            yield fp, future.result()
+
+    for fp, pages in _page_tasks(files):
+        inflight.append((fp, pool.submit(_extract_pages, fp, *pages) if pages else None))
+        if len(inflight) >= window:
+            yield from drain()
+    while inflight:
+        yield from drain()
+
+def ingest_folder(path="rag/source_documents", workers=None):
+    """
+    Klasörü manifest ile karşılaştırır: yalnızca yeni veya içeriği değişmiş
+    belgeleri süreç havuzunda paralel olarak metne çevirip ekler, değişmiş ve
+    silinmiş belgelerin eski parçalarını koleksiyondan kaldırır. Sayıları ve
+    saniye başına hızları döndürür.
+    """
+    started = time.perf_counter()
+    coll = get_backend()
+    manifest_path = os.path.join(coll.path, MANIFEST_NAME)
+    manifest = _load_manifest(manifest_path)
+    if manifest and coll.count() == 0:
+        # Koleksiyon silinmiş/yeniden oluşturulmuş; her şeyi yeniden ekle.
+        manifest = {}
+
+    files = {os.path.relpath(fp, path): fp for fp in glob.glob(os.path.join(path, "**/*.*"), recursive=True)}
+    hashes = {rel: file_hash(fp) for rel, fp in files.items()}
+    keys = {rel: doc_key(rel, h) for rel, h in hashes.items()}
+    todo = {files[rel]: keys[rel] for rel, h in hashes.items() if manifest.get(rel, {}).get("hash") != h}
+    stale = [rel for rel, entry in manifest.items() if rel not in hashes or entry["hash"] != hashes[rel]]
+
+    stale_ids = [i for rel in stale for i in chunk_ids(doc_key(rel, manifest[rel]["hash"]), manifest[rel]["chunks"])]
+    for i in range(0, len(stale_ids), ADD_BATCH_SIZE):
+        coll.delete(ids=stale_ids[i:i+ADD_BATCH_SIZE])
+    for rel in stale:
+        del manifest[rel]
+
+    cache = EmbeddingCache()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Sayfalar okundukça parçalanıp encode hattına akar; hiçbir belge
+            # bütün halinde belleğe alınmaz.
+            segments = _iter_segments(pool, list(todo), window=2 * (workers or os.cpu_count() or 1))
+            docs = ((todo[fp], iter_chunks(segment for _, segment in group),
+                     {"type":"evidence","emotion":"null","source":os.path.basename(fp)})
+                    for fp, group in itertools.groupby(segments, key=lambda item: item[0]))
+            counts = add_docs(docs, cache)
+    finally:
+        cache.close()
+    for rel, h in hashes.items():
+        if keys[rel] in counts:
+            manifest[rel] = {"hash": h, "chunks": counts[keys[rel]]}
+    if stale_ids and not any(counts.values()):
+        coll.persist()
+        bump_generation()
+    _save_manifest(manifest, manifest_path)
 
-def ingest_folder(path="rag/source_documents"):
-    for fp in glob.glob(os.path.join(path, "**/*.*"), recursive=True):
-        text = extract_text(fp)
-        add_doc(text, {"type":"evidence","emotion":"null","source":os.path.basename(fp)})
+    elapsed = time.perf_counter() - started
+    chunks = sum(counts.values())
+    return {
+        "backend": coll.name,
+        "docs": len(files),
+        "processed": len(todo),
+        "unchanged": len(files) - len(todo),
+        "removed": len([rel for rel in stale if rel not in hashes]),
+        "chunks": chunks,
+        "deleted_chunks": len(stale_ids),
+        "embedding_cache_hits": cache.hits,
+        "seconds": round(elapsed, 2),
+        "docs_per_sec": round(len(todo) / elapsed, 2) if elapsed else 0.0,
+        "chunks_per_sec": round(chunks / elapsed, 2) if elapsed else 0.0,
+    }
 
 if __name__ == "__main__":
-    ingest_folder()
-    print("Ingest tamam ✅")
+    stats = ingest_folder()
+    print(f"Ingest tamam ✅ [{stats['backend']}] {stats['docs']} belge ({stats['processed']} işlendi, {stats['unchanged']} değişmedi, "
+          f"{stats['removed']} silindi), {stats['chunks']} parça, {stats['seconds']} sn "
+          f"({stats['docs_per_sec']} belge/sn, {stats['chunks_per_sec']} parça/sn, "
+          f"{stats['embedding_cache_hits']} önbellek isabeti)")
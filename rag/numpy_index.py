@@ -0,0 +1,234 @@
+"""
+Süreç içi, bellek eşlemeli (memory-mapped) NumPy vektör indeksi.
+
+Birkaç bin parçalık derlem için Chroma istemcisine gerek bırakmaz: normalize
+edilmiş float32 vektörler bir `.npy` dosyasında, parça metinleri ve filtre
+alanları (type, emotion, source) JSON yan dosyasında tutulur. Vektör dosyası
+`mmap_mode="r"` ile açıldığı için aynı makinedeki worker süreçleri sayfaları
+işletim sisteminin sayfa önbelleği üzerinden paylaşır. En yakın k parça tek
+bir vektörel nokta çarpımıyla bulunur.
+
+Yan dosya, o anki vektör dosyasının adını da taşır; yazma işlemi önce yeni
+vektör dosyasını oluşturup sonra yan dosyayı atomik olarak değiştirdiği için
+okuyucular hiçbir zaman birbirine ait olmayan iki dosyayı eşleştirmez.
+
+`RAG_INDEX_QUANTIZATION=int8` ile vektörlerin satır başına ölçekli int8 kopyası
+da yazılır. Arama bu 4 kat küçük kopyayı tarar, en iyi k * RESCORE_FACTOR adayı
+ise float32 vektörlerle yeniden puanlar; float32 dosyasının yalnızca aday
+satırlarına dokunulur.
+"""
+import glob
+import json
+import os
+import threading
+import uuid
+
+import numpy as np
+
+from rag.store import current_generation
+
+INDEX_PATH = os.path.join(os.path.dirname(__file__), "index")
+META_FILE = "meta.json"
+QUANTIZATIONS = ("none", "int8")
+RESCORE_FACTOR = 4
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def quantize_int8(vectors):
+    """Her satırı kendi en büyük mutlak değerine göre [-127, 127] aralığına ölçekler."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.maximum(np.abs(vectors).max(axis=1, initial=0.0), 1e-12) / 127.0
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _best(scores, k):
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def top_k(q, vectors, k, rows=None, codes=None, scales=None, rescore=True):
+    """
+    Normalize edilmiş `q` sorgusuna en yakın k satırın indekslerini döndürür.
+    `rows` verilirse yalnızca o satırlar aranır. `codes`/`scales` (int8) verilirse
+    önce kuantize vektörler taranır; `rescore` ise adaylar float32 ile sıralanır.
+    """
+    n = len(vectors) if rows is None else len(rows)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    pick = (lambda a: a) if rows is None else (lambda a: a[rows])
+    if codes is None:
+        top = _best(pick(vectors) @ q, k)
+    else:
+        approx = (pick(codes) @ q) * pick(scales)
+        if rescore:
+            candidates = _best(approx, min(n, k * RESCORE_FACTOR))
+            exact = vectors[candidates if rows is None else rows[candidates]] @ q
+            top = candidates[_best(exact, k)]
+        else:
+            top = _best(approx, k)
+    return top if rows is None else rows[top]
+
+
+class _Snapshot:
+    """Diskteki indeksin belirli bir nesle ait, salt okunur görünümü."""
+
+    __slots__ = ("generation", "vectors", "codes", "scales", "ids", "documents", "metadatas", "_columns")
+
+    def __init__(self, generation, vectors, codes, scales, ids, documents, metadatas):
+        self.generation = generation
+        self.vectors = vectors
+        self.codes = codes
+        self.scales = scales
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self._columns = {}
+
+    def column(self, key):
+        # Filtre sütunları ilk kullanımda bir kez diziye çevrilir.
+        col = self._columns.get(key)
+        if col is None:
+            col = np.array([m.get(key) for m in self.metadatas], dtype=object)
+            self._columns[key] = col
+        return col
+
+
+class NumpyIndex:
+    name = "numpy"
+
+    def __init__(self, path=INDEX_PATH, quantization=None):
+        self.path = path
+        self.quantization = (quantization or os.getenv("RAG_INDEX_QUANTIZATION", "none")).lower()
+        if self.quantization not in QUANTIZATIONS:
+            raise ValueError(f"Bilinmeyen RAG_INDEX_QUANTIZATION: {self.quantization!r} (none veya int8 olmalı)")
+        self._meta_path = os.path.join(path, META_FILE)
+        self._snapshot = None
+        self._lock = threading.Lock()
+        # Yazma sırasında id -> (metin, metadata, vektör); persist() ile diske yazılır.
+        self._rows = None
+        self._dirty = False
+
+    # --- okuma ---
+
+    def _read(self):
+        for _ in range(3):
+            try:
+                with open(self._meta_path, encoding="utf-8") as f:
+                    sidecar = json.load(f)
+            except FileNotFoundError:
+                return np.zeros((0, 0), dtype=np.float32), None, None, [], [], []
+            try:
+                vectors = np.load(os.path.join(self.path, sidecar["vectors"]), mmap_mode="r")
+                codes = scales = None
+                if sidecar.get("int8"):
+                    codes = np.load(os.path.join(self.path, sidecar["int8"]), mmap_mode="r")
+                    scales = np.load(os.path.join(self.path, sidecar["scales"]))
+            except FileNotFoundError:
+                # Yan dosyayı okuduktan hemen sonra yeni bir yazma eski vektör
+                # dosyasını silmiş olabilir; yan dosyayı yeniden oku.
+                continue
+            return vectors, codes, scales, sidecar["ids"], sidecar["documents"], sidecar["metadatas"]
+        raise RuntimeError(f"NumPy indeksi okunamadı: {self.path}")
+
+    def _load(self):
+        generation = current_generation()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.generation == generation:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or self._snapshot.generation != generation:
+                self._snapshot = _Snapshot(generation, *self._read())
+            return self._snapshot
+
+    def query(self, emb, where, k, rescore=True):
+        snapshot = self._load()
+        if not snapshot.ids or k <= 0:
+            return []
+
+        mask = None
+        for key, value in (where or {}).items():
+            match = snapshot.column(key) == value
+            mask = match if mask is None else mask & match
+        rows = None if mask is None else np.flatnonzero(mask)
+
+        top = top_k(normalize(emb), snapshot.vectors, k, rows=rows,
+                    codes=snapshot.codes, scales=snapshot.scales, rescore=rescore)
+        return [(snapshot.documents[i], snapshot.metadatas[i]) for i in top]
+
+    def count(self):
+        if self._rows is not None:
+            return len(self._rows)
+        return len(self._load().ids)
+
+    def warm_up(self):
+        self._load()
+
+    # --- yazma (ingest.py) ---
+
+    def _writable(self):
+        if self._rows is None:
+            vectors, _, _, ids, documents, metadatas = self._read()
+            self._rows = {i: (d, m, np.array(v)) for i, d, m, v in zip(ids, documents, metadatas, vectors)}
+        return self._rows
+
+    def upsert(self, ids, documents, metadatas, embeddings):
+        rows = self._writable()
+        for i, d, m, v in zip(ids, documents, metadatas, normalize(embeddings)):
+            rows[i] = (d, m, v)
+        self._dirty = True
+
+    def delete(self, ids):
+        rows = self._writable()
+        for i in ids:
+            rows.pop(i, None)
+        self._dirty = True
+
+    def persist(self):
+        """Bekleyen değişiklikleri yeni bir vektör dosyası ve yan dosya olarak yazar."""
+        if not self._dirty:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        rows = self._rows
+        ids = list(rows)
+        dim = len(next(iter(rows.values()))[2]) if rows else 0
+        vectors = np.empty((len(ids), dim), dtype=np.float32)
+        for n, i in enumerate(ids):
+            vectors[n] = rows[i][2]
+
+        token = uuid.uuid4().hex[:12]
+        vectors_file = f"vectors-{token}.npy"
+        np.save(os.path.join(self.path, vectors_file), vectors)
+        files = {"vectors": vectors_file, "int8": None, "scales": None}
+        if self.quantization == "int8":
+            codes, scales = quantize_int8(vectors)
+            files["int8"], files["scales"] = f"vectors-{token}-int8.npy", f"vectors-{token}-scales.npy"
+            np.save(os.path.join(self.path, files["int8"]), codes)
+            np.save(os.path.join(self.path, files["scales"]), scales)
+        sidecar = {
+            **files,
+            "ids": ids,
+            "documents": [rows[i][0] for i in ids],
+            "metadatas": [rows[i][1] for i in ids],
+        }
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(sidecar, f, ensure_ascii=False)
+        os.replace(tmp_path, self._meta_path)
+
+        # Eski vektör dosyaları silinir; onları mmap ile açmış süreçler
+        # kendi kopyalarını kapanana kadar okumaya devam eder. Windows'ta mmap
+        # ile açık dosya silinemez; kalan dosyalar sonraki persist'te silinir.
+        for old in glob.glob(os.path.join(self.path, "vectors-*.npy")):
+            if os.path.basename(old) not in files.values():
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+        self._dirty = False
@@ -0,0 +1,88 @@
+"""
+Kuantize embedding ve int8 indeks yollarının float32 tabana göre isabet
+(recall@k) kaybını ve hız/bellek kazancını ölçer.
+
+    python -m rag.recall_check --embedder int8 --k 5
+
+Kaynak belgeler ingest ile aynı şekilde parçalanır; sorgular pick_for'un duygu
+sorguları ile örneklenmiş parçaların ilk kelimeleridir. Taban, tam hassasiyetli
+PyTorch modeli ve float32 vektörlerle yapılan kesin aramadır.
+"""
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+
+from rag import embedding, ingest, retrieve
+from rag.numpy_index import normalize, quantize_int8, top_k
+
+
+def _corpus(path, limit):
+    chunks = []
+    for fp in sorted(glob.glob(os.path.join(path, "**/*.*"), recursive=True)):
+        chunks.extend(ingest.iter_chunks(ingest.iter_pages(fp)))
+        if len(chunks) >= limit:
+            break
+    return chunks[:limit]
+
+
+def _queries(chunks, samples=50):
+    queries = [q for e in retrieve.EMOTIONS for q in retrieve._queries_for(e)]
+    step = max(1, len(chunks) // samples)
+    queries += [" ".join(c.split()[:12]) for c in chunks[::step][:samples]]
+    return queries
+
+
+def _encode(model, texts):
+    started = time.perf_counter()
+    vectors = normalize(model.encode(texts, batch_size=64, normalize_embeddings=True))
+    return vectors, (time.perf_counter() - started) * 1000 / max(len(texts), 1)
+
+
+def _recall(expected, found):
+    return float(np.mean([len(set(e) & set(f)) / len(e) for e, f in zip(expected, found) if len(e)]))
+
+
+def run(embedder="int8", k=5, path="rag/source_documents", limit=2000):
+    chunks = _corpus(path, limit)
+    if not chunks:
+        raise SystemExit(f"{path} altında parça bulunamadı.")
+    queries = _queries(chunks)
+
+    base = embedding.load_model("torch")
+    base_docs, base_ms = _encode(base, chunks)
+    base_q, _ = _encode(base, queries)
+    expected = [top_k(q, base_docs, k) for q in base_q]
+    codes, scales = quantize_int8(base_docs)
+
+    rows = [("torch / float32", 1.0, base_ms, base_docs.nbytes)]
+    rows.append(("torch / int8", _recall(expected, [top_k(q, base_docs, k, codes=codes, scales=scales, rescore=False) for q in base_q]),
+                 base_ms, codes.nbytes + scales.nbytes))
+    rows.append(("torch / int8+rescore", _recall(expected, [top_k(q, base_docs, k, codes=codes, scales=scales) for q in base_q]),
+                 base_ms, codes.nbytes + scales.nbytes))
+    if embedder != "torch":
+        model = embedding.load_model(embedder)
+        docs, ms = _encode(model, chunks)
+        q_vectors, _ = _encode(model, queries)
+        codes, scales = quantize_int8(docs)
+        rows.append((f"{embedder} / float32", _recall(expected, [top_k(q, docs, k) for q in q_vectors]), ms, docs.nbytes))
+        rows.append((f"{embedder} / int8+rescore", _recall(expected, [top_k(q, docs, k, codes=codes, scales=scales) for q in q_vectors]),
+                     ms, codes.nbytes + scales.nbytes))
+
+    print(f"{len(chunks)} parça, {len(queries)} sorgu, recall@{k} (taban: torch / float32)")
+    print(f"{'embedder / indeks':<28}{'recall':>8}{'fark':>8}{'ms/parça':>10}{'indeks KB':>11}")
+    for name, recall, ms, nbytes in rows:
+        print(f"{name:<28}{recall:>8.3f}{recall - 1.0:>+8.3f}{ms:>10.2f}{nbytes / 1024:>11.1f}")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--embedder", choices=embedding.EMBEDDERS, default="int8")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--path", default="rag/source_documents")
+    parser.add_argument("--limit", type=int, default=2000, help="en fazla bu kadar parça kullanılır")
+    args = parser.parse_args()
+    run(args.embedder, args.k, args.path, args.limit)
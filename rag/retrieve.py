@@ -1,30 +1,83 @@
-from chromadb import Client
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
+import threading
 
-EMBED = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-DB = Client(Settings(persist_directory="rag/data", anonymized_telemetry=False))
-COLL = DB.get_or_create_collection("moodmuse_rag")
+from rag import embedding
+from rag.store import current_generation, get_backend
+
+# Uygulamanın ürettiği duygu etiketleri ("karmaşık" sınıflandırıcının yedeğidir).
+EMOTIONS = ("mutlu", "üzgün", "kızgın", "şaşkın", "sakin", "enerjik", "düşünceli", "kararsız", "karmaşık")
+
+STYLE_QUERY = "kısa yargısız sen kip nefes"
+EXAMPLE_QUERY = "{emotion} için kısa örnek"
+EVIDENCE_QUERY = "nefes farkındalık {emotion}"
+
+# pick_for sorguları yalnızca duygu etiketine bağlı olduğu için vektörleri bir
+# kez hesaplanıp burada tutulur (etiket sayısıyla sınırlı).
+_query_vectors = {}
+_query_lock = threading.Lock()
+
+# pick_for sonuçları (duygu, koleksiyon nesli) anahtarıyla tutulur; ingest
+# nesli artırdığında eski sonuçlar kullanılmaz hale gelir.
+_results = {}
+_results_lock = threading.Lock()
+
+def _queries_for(emotion):
+    return STYLE_QUERY, EXAMPLE_QUERY.format(emotion=emotion), EVIDENCE_QUERY.format(emotion=emotion)
+
+def embed_queries(texts, cache=False):
+    """
+    Sorgu metinlerini tek bir toplu encode çağrısıyla vektöre çevirir.
+    Önceden hesaplanmış vektörler yeniden kullanılır; `cache` True ise yeni
+    hesaplananlar da saklanır.
+    """
+    missing = [t for t in dict.fromkeys(texts) if t not in _query_vectors]
+    computed = {}
+    if missing:
+        computed = dict(zip(missing, embedding.encode(missing, batch_size=64).tolist()))
+        if cache:
+            with _query_lock:
+                _query_vectors.update(computed)
+    return [_query_vectors.get(t) or computed[t] for t in texts]
+
+def precompute_query_embeddings(emotions=EMOTIONS):
+    """Tüm duygu etiketlerinin pick_for sorgu vektörlerini tek toplu encode ile hazırlar."""
+    embed_queries([q for e in emotions for q in _queries_for(e)], cache=True)
+
+def _query(emb, where, k):
+    return get_backend().query(emb, where, k)
 
 def query_similar(text, where=None, k=2):
     """
-    ChromaDB'de anlamsal arama yapar. 
-    'where' filtresi birden fazla koşul içeriyorsa, bunları $and operatörü ile birleştirir.
+    Seçili vektör deposunda (Chroma veya NumPy indeksi) anlamsal arama yapar.
+    'where' filtresindeki tüm koşullar birlikte sağlanmalıdır.
     """
-    
-    final_where = where or {}
-    if where and len(where) > 1:
-        final_where = {"$and": [{key: value} for key, value in where.items()]}
+    return _query(embed_queries([text])[0], where, k)
 
-    emb = EMBED.encode(text).tolist()
-    res = COLL.query(query_embeddings=[emb], n_results=k, where=final_where)
-    docs = res["documents"][0] if res and res["documents"] else []
-    metas = res["metadatas"][0] if res and res["metadatas"] else []
-    return list(zip(docs, metas))
+def cached_pick_for(emotion:str):
+    """pick_for sonucu güncel nesil için önbellekteyse döndürür, değilse None."""
+    return _results.get((emotion, current_generation()))
 
 def pick_for(emotion:str):
-    style = query_similar("kısa yargısız sen kip nefes", where={"type":"style"}, k=1)
+    generation = current_generation()
+    cached = _results.get((emotion, generation))
+    if cached is not None:
+        return cached
+
+    style_emb, example_emb, evidence_emb = embed_queries(_queries_for(emotion), cache=True)
+    style = _query(style_emb, where={"type":"style"}, k=1)
     # Birden fazla koşul içeren 'where' filtresi artık doğru çalışacak.
-    examples = query_similar(f"{emotion} için kısa örnek", where={"type":"example","emotion":emotion}, k=2)
-    evidence = query_similar(f"nefes farkındalık {emotion}", where={"type":"evidence"}, k=1)
-    return style, examples, evidence
+    examples = _query(example_emb, where={"type":"example","emotion":emotion}, k=2)
+    evidence = _query(evidence_emb, where={"type":"evidence"}, k=1)
+    result = (style, examples, evidence)
+
+    with _results_lock:
+        # Eski nesillere ait sonuçları at.
+        for key in [key for key in _results if key[1] != generation]:
+            del _results[key]
+        _results[(emotion, generation)] = result
+    return result
+
+def warm_up():
+    """Embedding modelini, sorgu vektörlerini ve vektör deposunu istek gelmeden önce yükler."""
+    embedding.warm_up()
+    precompute_query_embeddings()
+    get_backend().warm_up()
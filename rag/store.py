@@ -0,0 +1,117 @@
+"""
+ingest.py ve retrieve.py'nin paylaştığı vektör deposu. İstemci ilk
+kullanımda açılır ve aynı kalıcılık dizinini kullanır.
+
+Depo `RAG_BACKEND` ortam değişkeniyle seçilir: "chroma" (varsayılan) veya
+"numpy" (rag/numpy_index.py). Her iki arka uç da aynı arayüzü sunar:
+query(emb, where, k), upsert(...), delete(ids), count(), persist(), warm_up().
+"""
+import os
+import threading
+
+CHROMA_PATH = os.path.join(os.path.dirname(__file__), "chroma")
+COLLECTION_NAME = "moodmuse_rag"
+
+_collection = None
+_lock = threading.Lock()
+
+
+def get_collection():
+    global _collection
+    if _collection is None:
+        with _lock:
+            if _collection is None:
+                from chromadb import PersistentClient
+                from chromadb.config import Settings
+                client = PersistentClient(path=CHROMA_PATH, settings=Settings(anonymized_telemetry=False))
+                _collection = client.get_or_create_collection(COLLECTION_NAME)
+    return _collection
+
+
+class ChromaBackend:
+    """Chroma koleksiyonu üzerinden arama ve yazma; Chroma kendisi kalıcı yazar."""
+
+    name = "chroma"
+    path = CHROMA_PATH
+
+    def query(self, emb, where, k):
+        # Birden fazla koşul içeren 'where' filtresi $and ile birleştirilir.
+        final_where = where or {}
+        if where and len(where) > 1:
+            final_where = {"$and": [{key: value} for key, value in where.items()]}
+
+        res = get_collection().query(query_embeddings=[emb], n_results=k, where=final_where)
+        docs = res["documents"][0] if res and res["documents"] else []
+        metas = res["metadatas"][0] if res and res["metadatas"] else []
+        return list(zip(docs, metas))
+
+    def upsert(self, ids, documents, metadatas, embeddings):
+        get_collection().upsert(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+
+    def delete(self, ids):
+        get_collection().delete(ids=ids)
+
+    def count(self):
+        return get_collection().count()
+
+    def persist(self):
+        pass
+
+    def warm_up(self):
+        get_collection()
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                name = os.getenv("RAG_BACKEND", "chroma").lower()
+                if name == "numpy":
+                    from rag.numpy_index import NumpyIndex
+                    _backend = NumpyIndex()
+                elif name == "chroma":
+                    _backend = ChromaBackend()
+                else:
+                    raise ValueError(f"Bilinmeyen RAG_BACKEND: {name!r} (chroma veya numpy olmalı)")
+    return _backend
+
+
+# Koleksiyona belge eklendiğinde veya silindiğinde artırılan nesil numarası.
+# Ayrı süreçlerde çalışan ingest ile backend arasında dosya üzerinden paylaşılır;
+# retrieve.py önbelleğe aldığı sonuçları bu numarayla ilişkilendirir.
+GENERATION_PATH = os.path.join(CHROMA_PATH, "generation")
+
+_generation = (None, 0)  # ((inode, mtime_ns), nesil)
+
+
+def current_generation() -> int:
+    """Güncel nesil numarası; dosya yalnızca değiştiğinde yeniden okunur."""
+    global _generation
+    try:
+        stat = os.stat(GENERATION_PATH)
+    except FileNotFoundError:
+        return 0
+    # bump_generation dosyayı os.replace ile değiştirdiği için inode da değişir.
+    version = (stat.st_ino, stat.st_mtime_ns)
+    if version != _generation[0]:
+        try:
+            with open(GENERATION_PATH, encoding="utf-8") as f:
+                _generation = (version, int(f.read().strip() or 0))
+        except (OSError, ValueError):
+            return _generation[1]
+    return _generation[1]
+
+
+def bump_generation() -> int:
+    """Nesil numarasını artırır; önbelleğe alınmış arama sonuçları geçersiz olur."""
+    generation = current_generation() + 1
+    os.makedirs(CHROMA_PATH, exist_ok=True)
+    tmp_path = GENERATION_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(str(generation))
+    os.replace(tmp_path, GENERATION_PATH)
+    return generation